@@ -0,0 +1,390 @@
+"""
+Almacén local de cotizaciones diarias (SQLite)
+
+Guarda las ruedas descargadas para que sobrevivan a reinicios del proceso.
+Las ruedas cerradas no cambian: una vez guardadas no se vuelven a descargar
+ni se modifican. Solo se piden a la red los tramos que faltan (días previos
+al primer día guardado y la cola desde el último día cerrado), y la rueda
+de hoy se reemplaza en cada descarga. Qué ruedas están cerradas, y si la
+cola puede traer algo nuevo, sale del calendario de cada mercado (ver
+calendario.py): con el mercado cerrado la cola no se vuelve a pedir.
+
+Las cotizaciones vienen ajustadas por dividendos y splits, así que un
+evento corporativo cambia toda la historia hacia atrás. Por eso la cola se
+pide desde el último día cerrado (una rueda superpuesta): si esa rueda ya
+no coincide con la guardada, la historia del símbolo se descarga de nuevo.
+
+También guarda el estado de indicadores incrementales (RSI de Wilder)
+junto con su serie, para retomarlos sin recalcular la historia.
+
+Los símbolos que nunca devolvieron datos (mal escritos o deslistados) se
+recuerdan durante TTL_SIN_DATOS: mientras tanto no se vuelven a pedir.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import calendario
+import descargas
+
+# Ubicación de la base (se puede cambiar con la variable de entorno RSI_ALMACEN)
+RUTA_ALMACEN = os.environ.get(
+    "RSI_ALMACEN",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos", "cotizaciones.sqlite")
+)
+
+# Tiempo durante el que no se vuelve a pedir un símbolo que no devolvió datos
+TTL_SIN_DATOS = timedelta(hours=1)
+
+# Diferencia relativa en una rueda cerrada a partir de la cual la historia se considera reajustada
+TOLERANCIA_REAJUSTE = 1e-6
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS barras (
+    simbolo TEXT NOT NULL,
+    fecha   TEXT NOT NULL,
+    close   REAL NOT NULL,
+    volume  REAL,
+    PRIMARY KEY (simbolo, fecha)
+);
+CREATE TABLE IF NOT EXISTS cobertura (
+    simbolo TEXT PRIMARY KEY,
+    desde   TEXT NOT NULL,
+    hasta   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sin_datos (
+    simbolo TEXT PRIMARY KEY,
+    hasta   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS estado_indicador (
+    clave TEXT PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    datos BLOB NOT NULL
+);
+"""
+
+_lock_esquema = threading.Lock()
+_esquema_creado = set()
+
+
+def _conectar():
+    """
+    Abre una conexión nueva (una por operación, así se puede usar desde varios hilos)
+    """
+    with _lock_esquema:
+        if RUTA_ALMACEN not in _esquema_creado:
+            os.makedirs(os.path.dirname(RUTA_ALMACEN) or ".", exist_ok=True)
+            con = sqlite3.connect(RUTA_ALMACEN, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_ESQUEMA)
+            con.close()
+            _esquema_creado.add(RUTA_ALMACEN)
+
+    return sqlite3.connect(RUTA_ALMACEN, timeout=30)
+
+
+def _a_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def leer(simbolo, desde=None):
+    """
+    Lee las ruedas guardadas de un símbolo desde una fecha
+    Retorna un DataFrame con Close y Volume (vacío si no hay datos)
+    """
+    consulta = "SELECT fecha, close, volume FROM barras WHERE simbolo = ?"
+    parametros = [simbolo]
+    if desde is not None:
+        consulta += " AND fecha >= ?"
+        parametros.append(_a_fecha(desde).isoformat())
+    consulta += " ORDER BY fecha"
+
+    con = _conectar()
+    try:
+        filas = con.execute(consulta, parametros).fetchall()
+    finally:
+        con.close()
+
+    df = pd.DataFrame(filas, columns=['Date', 'Close', 'Volume'])
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('Date')), name='Date')
+    return df.astype(float)
+
+
+def cobertura(simbolo):
+    """
+    Retorna (desde, hasta) del tramo ya descargado, o None
+    'hasta' es el último día cerrado: lo posterior se considera provisorio
+    """
+    con = _conectar()
+    try:
+        fila = con.execute(
+            "SELECT desde, hasta FROM cobertura WHERE simbolo = ?", (simbolo,)
+        ).fetchone()
+    finally:
+        con.close()
+
+    if fila is None:
+        return None
+    return date.fromisoformat(fila[0]), date.fromisoformat(fila[1])
+
+
+def guardar(simbolo, df, desde, hasta):
+    """
+    Guarda las ruedas descargadas y extiende la cobertura a [desde, hasta]
+    Las ruedas ya cerradas son inmutables; las provisorias se reemplazan
+    """
+    cobertura_actual = cobertura(simbolo)
+    cerrado_hasta = cobertura_actual[1] if cobertura_actual else date.min
+
+    filas = [
+        (simbolo, fecha.strftime('%Y-%m-%d'), float(close), float(volume))
+        for fecha, close, volume in zip(df.index, df['Close'], df['Volume'])
+        if pd.notna(close)
+    ]
+    cerradas = [f for f in filas if date.fromisoformat(f[1]) <= cerrado_hasta]
+    provisorias = [f for f in filas if date.fromisoformat(f[1]) > cerrado_hasta]
+
+    if cobertura_actual is not None:
+        desde = min(desde, cobertura_actual[0])
+        hasta = max(hasta, cobertura_actual[1])
+
+    con = _conectar()
+    try:
+        with con:
+            con.executemany("INSERT OR IGNORE INTO barras VALUES (?, ?, ?, ?)", cerradas)
+            con.executemany("INSERT OR REPLACE INTO barras VALUES (?, ?, ?, ?)", provisorias)
+            con.execute(
+                "INSERT OR REPLACE INTO cobertura VALUES (?, ?, ?)",
+                (simbolo, desde.isoformat(), hasta.isoformat())
+            )
+    finally:
+        con.close()
+
+
+def tramos_faltantes(simbolo, inicio, ahora=None):
+    """
+    Calcula los tramos [start, end) que hay que descargar para cubrir desde inicio hasta hoy
+    Incluye la cola solo si el mercado del símbolo abrió alguna rueda después
+    del último día cerrado (la de hoy puede seguir cambiando); la cola empieza
+    en ese día cerrado, para comparar la rueda superpuesta con la guardada
+    """
+    inicio = _a_fecha(inicio)
+    ahora = ahora or calendario.ahora()
+    manana = ahora.astimezone().date() + timedelta(days=1)
+
+    actual = cobertura(simbolo)
+    if actual is None:
+        return [(inicio, manana)]
+
+    desde, hasta = actual
+    tramos = []
+    if inicio < desde:
+        tramos.append((inicio, desde))
+    if calendario.hay_rueda_nueva(calendario.mercado(simbolo), hasta, ahora):
+        tramos.append((hasta, manana))
+    return tramos
+
+
+def borrar(simbolo):
+    """
+    Borra las ruedas y la cobertura de un símbolo (ej. si el proveedor reajustó su historia)
+    """
+    con = _conectar()
+    try:
+        with con:
+            con.execute("DELETE FROM barras WHERE simbolo = ?", (simbolo,))
+            con.execute("DELETE FROM cobertura WHERE simbolo = ?", (simbolo,))
+    finally:
+        con.close()
+
+
+def reajustado(simbolo, df, hasta):
+    """
+    True si alguna rueda cerrada (hasta inclusive) que vino de nuevo en df
+    no coincide con la guardada: el proveedor reajustó la historia por un
+    dividendo o un split
+    """
+    superpuestas = df[df.index <= pd.Timestamp(hasta)]
+    if superpuestas.empty:
+        return False
+
+    nuevas = pd.Series(superpuestas['Close'].to_numpy(), index=pd.DatetimeIndex(superpuestas.index.strftime('%Y-%m-%d')))
+    guardadas = leer(simbolo, nuevas.index[0])['Close']
+    comunes = nuevas.index.intersection(guardadas.index)
+    diferencia = (nuevas[comunes] - guardadas[comunes]).abs()
+    return bool((diferencia > TOLERANCIA_REAJUSTE * guardadas[comunes].abs()).any())
+
+
+def sin_datos(simbolos):
+    """
+    Retorna {simbolo: hasta} de los símbolos que no devolvieron datos y
+    todavía no se vuelven a pedir (hasta es la fecha y hora en que vence)
+    """
+    simbolos = list(simbolos)
+    if not simbolos:
+        return {}
+
+    ahora = datetime.now().isoformat(timespec='seconds')
+    con = _conectar()
+    try:
+        filas = con.execute(
+            f"SELECT simbolo, hasta FROM sin_datos WHERE hasta > ? AND simbolo IN ({', '.join('?' * len(simbolos))})",
+            [ahora] + simbolos
+        ).fetchall()
+    finally:
+        con.close()
+
+    return {simbolo: datetime.fromisoformat(hasta) for simbolo, hasta in filas}
+
+
+def marcar_sin_datos(simbolos):
+    """
+    Recuerda que los símbolos no devolvieron datos, hasta que venza TTL_SIN_DATOS
+    """
+    hasta = (datetime.now() + TTL_SIN_DATOS).isoformat(timespec='seconds')
+    con = _conectar()
+    try:
+        with con:
+            con.executemany(
+                "INSERT OR REPLACE INTO sin_datos VALUES (?, ?)",
+                [(simbolo, hasta) for simbolo in simbolos]
+            )
+    finally:
+        con.close()
+
+
+def hasta_cubierto(simbolo, df, end, ahora):
+    """
+    Último día que una descarga del tramo [start, end) deja cubierto: no pasa
+    de la última rueda cerrada del mercado ni de la última rueda recibida
+    (si el proveedor todavía no publicó la rueda cerrada, se vuelve a pedir)
+    """
+    cerrada = calendario.ultima_rueda_cerrada(calendario.mercado(simbolo), ahora)
+    return min(end - timedelta(days=1), cerrada, df.index[-1].date())
+
+
+def historial(simbolos, inicio, descargar, ahora=None, marcar=True):
+    """
+    Retorna {simbolo: DataFrame} desde inicio, descargando solo lo que falta
+    descargar(simbolos, start, end) debe retornar {simbolo: DataFrame con Close y Volume}
+    Los símbolos que necesitan el mismo tramo se descargan juntos en una sola consulta
+    Los símbolos sin ninguna rueda guardada que no devuelven datos (o cuya
+    descarga individual falla con un error no transitorio) se marcan con marcar_sin_datos y no se piden
+    hasta que venza TTL_SIN_DATOS; con marcar=False (descargar no consulta
+    al proveedor, ej. solo almacén) no se marca ninguno
+    Si una descarga falla solo para algunos símbolos (descargas.ErrorParcial)
+    se guarda lo que llegó y al final se lanza el error
+    Si la rueda superpuesta de la cola no coincide con la guardada (ver
+    reajustado), la historia del símbolo se borra y se descarga completa
+    """
+    ahora = ahora or calendario.ahora()
+    manana = ahora.astimezone().date() + timedelta(days=1)
+    omitidos = sin_datos(simbolos)
+
+    # Agrupar símbolos por tramo faltante
+    pendientes = {}
+    nuevos = set()
+    coberturas = {}
+    for simbolo in simbolos:
+        if simbolo in omitidos:
+            continue
+        coberturas[simbolo] = cobertura(simbolo)
+        if coberturas[simbolo] is None:
+            nuevos.add(simbolo)
+        for tramo in tramos_faltantes(simbolo, inicio, ahora):
+            pendientes.setdefault(tramo, []).append(simbolo)
+
+    reajustados = []
+    error_parcial = None
+    for (start, end), grupo in pendientes.items():
+        fallidos = ()
+        try:
+            descargados = descargar(tuple(grupo), start, end)
+        except descargas.ErrorParcial as e:
+            # Lo que llegó se guarda igual; la falla se lanza al terminar
+            descargados = e.datos
+            fallidos = e.simbolos
+            error_parcial = e
+        except Exception as e:
+            # Un corte o un límite de pedidos no dice que el símbolo no cotice
+            if marcar and len(grupo) == 1 and grupo[0] in nuevos and not descargas.es_transitorio(e):
+                marcar_sin_datos(grupo)
+            raise
+
+        for simbolo, df in descargados.items():
+            if df is None or df.empty:
+                continue
+            actual = coberturas.get(simbolo)
+            if actual is not None and start == actual[1] and reajustado(simbolo, df, actual[1]):
+                reajustados.append(simbolo)
+                continue
+            # Lo descargado cubre el tramo hasta su última rueda recibida; las
+            # ruedas ya terminadas en su mercado quedan cerradas
+            guardar(simbolo, df, start, hasta_cubierto(simbolo, df, end, ahora))
+
+        vacios = [
+            s for s in grupo
+            if s in nuevos and s not in fallidos and (descargados.get(s) is None or descargados[s].empty)
+        ]
+        if vacios and marcar:
+            marcar_sin_datos(vacios)
+
+    # Historias reajustadas: se reemplazan completas, en una sola consulta
+    if reajustados:
+        start = min(min(coberturas[s][0] for s in reajustados), _a_fecha(inicio))
+        descargados = descargar(tuple(reajustados), start, manana)
+        for simbolo in reajustados:
+            borrar(simbolo)
+            df = descargados.get(simbolo)
+            if df is not None and not df.empty:
+                guardar(simbolo, df, start, hasta_cubierto(simbolo, df, manana, ahora))
+
+    if error_parcial is not None:
+        raise error_parcial
+
+    datos = {}
+    for simbolo in simbolos:
+        df = leer(simbolo, inicio)
+        if not df.empty:
+            datos[simbolo] = df
+    return datos
+
+
+def leer_estado(clave):
+    """
+    Retorna (fecha, datos) del estado guardado de un indicador, o None
+    """
+    con = _conectar()
+    try:
+        fila = con.execute(
+            "SELECT fecha, datos FROM estado_indicador WHERE clave = ?", (clave,)
+        ).fetchone()
+    finally:
+        con.close()
+
+    if fila is None:
+        return None
+    return date.fromisoformat(fila[0]), pickle.loads(fila[1])
+
+
+def guardar_estado(clave, fecha, datos):
+    """
+    Guarda el estado de un indicador a una fecha (la última rueda cerrada procesada)
+    """
+    con = _conectar()
+    try:
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO estado_indicador VALUES (?, ?, ?)",
+                (clave, _a_fecha(fecha).isoformat(), pickle.dumps(datos))
+            )
+    finally:
+        con.close()
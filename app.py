@@ -1,10 +1,29 @@
-import streamlit as st
-import yfinance as yf
+import time
+inicio_ejecucion = time.perf_counter()  # Para medir el arranque y cada rerun (ver tiempos.py)
+
+import contextvars
+import functools
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import streamlit as st
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import almacen
+import calendario
+import descargas
+import graficos
+import metricas
+import nucleo
+import tiempos
+
+# Logs estructurados y registro de tiempos de esta ejecución (ver tiempos.py)
+tiempos.configurar_logs()
+registro_tiempos = tiempos.iniciar_registro()
+
+# Métricas para Prometheus, si está definida RSI_METRICAS_PUERTO (ver metricas.py)
+metricas.servir_desde_entorno()
 
 # Configuración de la página
 st.set_page_config(
@@ -17,230 +36,458 @@ st.set_page_config(
 st.title("📈 RSI en Dólares - Acciones Argentinas")
 st.markdown("Calcula el RSI de acciones argentinas **expresado en dólares** usando el tipo de cambio implícito histórico de GGAL")
 
+# Métodos de cálculo del RSI (etiqueta en la barra lateral -> método)
+METODOS_RSI = {
+    "Media simple": "simple",
+    "Wilder": "wilder"
+}
+
+# Vigencia de los datos cacheados en esta ejecución: cambia con la cadencia durante
+# la rueda y queda fija con los mercados cerrados (ver calendario.py)
+vigencia_datos = calendario.vigencia()
+
+# Las funciones cacheadas no tienen TTL (se invalidan con la vigencia), así
+# que ante una falla lanzan una excepción en vez de retornarla: st.cache_data
+# no guarda excepciones y la próxima ejecución vuelve a intentar. Acá quedan
+# las fallas de esta ejecución, para no repetir la misma consulta en cada llamada
+fallas_ejecucion = {}
+
+# Función para llamar a una función cacheada sin repetir una falla de esta ejecución
+def sin_repetir_falla(funcion, *args):
+    """
+    Llama a funcion(*args); si ya falló con los mismos argumentos en esta
+    ejecución lanza la misma excepción sin volver a llamarla
+    """
+    clave = (funcion.__name__, args)
+    if clave in fallas_ejecucion:
+        raise fallas_ejecucion[clave]
+    try:
+        return funcion(*args)
+    except Exception as e:
+        fallas_ejecucion[clave] = e
+        raise
+
+# Decorador para medir las funciones cacheadas
+def medir_cache(funcion):
+    """
+    Mide cada llamada a una función cacheada como la etapa "cache.<nombre>"
+    Se registra como acierto salvo que la función corra y anote cache="fallo"
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with tiempos.medir(f"cache.{funcion.__name__}", cache="acierto"):
+            return funcion(*args, **kwargs)
+    
+    envoltura.clear = funcion.clear
+    return envoltura
+
+# Función para descargar varias acciones en una sola consulta
+@medir_cache
+@st.cache_data(max_entries=32)
+def descargar_lote(simbolos, vigencia):
+    """
+    Obtiene todos los símbolos desde el almacén local, descargando
+    en una sola consulta solo las ruedas que faltan
+    Siempre cubre la ventana máxima, así cambiar "Días históricos" no descarga de nuevo
+    La cache dura mientras no cambie la vigencia (ver calendario.vigencia)
+    Si la descarga falla lanza la excepción
+    """
+    tiempos.anotar(cache="fallo", simbolos=len(simbolos))
+    return nucleo.descargar_acciones(simbolos)
+
+# Función para validar una lista de tickers
+def validar_tickers(tickers):
+    """
+    Validación rápida de una lista de tickers: todos se consultan juntos con
+    descargar_lote (la misma consulta cacheada que usa el cálculo) y los que
+    no tienen cotizaciones quedan recordados en el almacén por un tiempo
+    Retorna la lista de tickers sin datos
+    """
+    simbolos = tuple(dict.fromkeys(f"{t}.BA" for t in tickers))
+    try:
+        sin_repetir_falla(descargar_lote, simbolos, vigencia_datos)
+    except Exception:
+        pass
+    
+    # Solo los marcados en el almacén: si la consulta falló no se descarta ninguno
+    sin_datos = almacen.sin_datos(simbolos)
+    return [t for t in dict.fromkeys(tickers) if f"{t}.BA" in sin_datos]
+
+# Error de la serie de TC cuando ningún par tiene datos
+class SinSerieTC(RuntimeError):
+    """
+    Ningún par dio una serie de TC; motivos son los de los pares descartados
+    """
+    def __init__(self, motivos):
+        super().__init__("No se pudo obtener la serie de TC con ningún par")
+        self.motivos = motivos
+
+# Función para obtener la serie de TC
+@medir_cache
+@st.cache_data(max_entries=4)
+def obtener_serie_tc(vigencia):
+    """
+    Mantiene una única serie de TC, de la que salen tanto el TC actual
+    como el histórico (ver nucleo.obtener_serie_tc), hasta que cambie la vigencia
+    Si ningún par tiene datos lanza SinSerieTC
+    Retorna (df_tc, par usado, digest, motivos de los pares descartados)
+    """
+    tiempos.anotar(cache="fallo")
+    df_tc, par, digest, motivos = nucleo.obtener_serie_tc()
+    if df_tc is None:
+        raise SinSerieTC(motivos)
+    return df_tc, par, digest, motivos
+
+# Función para leer la serie de TC cacheada
+def serie_tc_cacheada():
+    """
+    Retorna lo mismo que obtener_serie_tc; si no hay serie retorna
+    (None, None, None, motivos), consultando una sola vez por ejecución
+    """
+    try:
+        return sin_repetir_falla(obtener_serie_tc, vigencia_datos)
+    except SinSerieTC as e:
+        return None, None, None, e.motivos
+
+# Función para obtener el TC actual sin la serie histórica
+@medir_cache
+@st.cache_data(max_entries=4)
+def obtener_tc_reciente(vigencia):
+    """
+    Respaldo del TC actual si falla la serie de TC (ver nucleo.obtener_tc_reciente)
+    Si ningún par tiene datos lanza RuntimeError
+    Retorna (tc, precio BA, precio US, par)
+    """
+    tiempos.anotar(cache="fallo")
+    reciente = nucleo.obtener_tc_reciente()
+    if reciente is None:
+        raise RuntimeError("No se pudo obtener el TC actual con ningún par")
+    return reciente
+
+# Función para armar la SerieTC vigente
+def serie_tc_vigente():
+    """
+    Retorna la SerieTC de la serie de TC cacheada (o None), sin mostrar mensajes
+    """
+    df_tc, par, digest, _ = serie_tc_cacheada()
+    return nucleo.armar_serie_tc(df_tc, par, digest)
+
 # Función para obtener tipo de cambio histórico
-@st.cache_data(ttl=300)
-def obtener_tipo_cambio_historico(periodo_dias=365):
+def obtener_tipo_cambio_historico():
     """
-    Calcula el tipo de cambio histórico usando el ratio GGAL
-    GGAL.BA / GGAL (NASDAQ) * 10
+    Retorna una SerieTC con toda la serie de TC (cubre la ventana máxima)
     """
-    intentos = [
-        ("GGAL.BA", "GGAL", 10),  # GGAL con multiplicador 10
-        ("BMA.BA", "BMA", 1),      # Banco Macro sin multiplicador
-        ("YPF.BA", "YPF", 1)       # YPF sin multiplicador
-    ]
+    for motivo in serie_tc_cacheada()[3]:
+        st.warning(motivo)
     
-    for ticker_ba, ticker_us, multiplicador in intentos:
-        try:
-            st.info(f"Intentando obtener TC con {ticker_ba}/{ticker_us}...")
-            
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=periodo_dias + 30)  # Pedir más días
-            
-            # Descargar datos
-            stock_ba = yf.download(ticker_ba, start=start_date, end=end_date, progress=False)
-            stock_us = yf.download(ticker_us, start=start_date, end=end_date, progress=False)
-            
-            if stock_ba.empty or stock_us.empty:
-                st.warning(f"No hay datos para {ticker_ba} o {ticker_us}")
-                continue
-            
-            # Extraer la columna Close correctamente
-            if isinstance(stock_ba.columns, pd.MultiIndex):
-                close_ba = stock_ba['Close'].iloc[:, 0] if stock_ba['Close'].ndim > 1 else stock_ba['Close']
-                close_us = stock_us['Close'].iloc[:, 0] if stock_us['Close'].ndim > 1 else stock_us['Close']
-            else:
-                close_ba = stock_ba['Close']
-                close_us = stock_us['Close']
-            
-            # Crear DataFrame con ambos precios usando el mismo índice
-            df_tc = pd.DataFrame({
-                'BA': close_ba,
-                'US': close_us
-            }, index=close_ba.index)
-            
-            # Eliminar NaN
-            df_tc = df_tc.dropna()
-            
-            if len(df_tc) < 10:
-                st.warning(f"Muy pocos datos para {ticker_ba}")
-                continue
-            
-            # Calcular TC
-            df_tc['TC'] = (df_tc['BA'] / df_tc['US']) * multiplicador
-            
-            st.success(f"✅ TC obtenido usando {ticker_ba} ({len(df_tc)} días)")
-            return df_tc
-            
-        except Exception as e:
-            st.warning(f"Error con {ticker_ba}: {str(e)}")
-            continue
+    serie_tc = serie_tc_vigente()
+    
+    if serie_tc is None:
+        # Si ninguno funcionó
+        st.error("No se pudo obtener TC con ningún ticker. Usando TC fijo como fallback.")
+        return None
+    
+    st.success(f"✅ TC obtenido usando {serie_tc.par[0]} ({len(serie_tc.df)} días)")
     
-    # Si ninguno funcionó
-    st.error("No se pudo obtener TC con ningún ticker. Usando TC fijo como fallback.")
-    return None
+    return serie_tc
 
 # Función para obtener TC actual
-@st.cache_data(ttl=300)
 def obtener_tipo_cambio_actual():
     """
-    Calcula el tipo de cambio actual
+    Calcula el tipo de cambio actual (último día de la serie de TC)
+    Sin serie de TC usa el respaldo liviano de las últimas ruedas
+    Retorna (tc, precio BA, precio US, par) o (None, None, None, None)
     """
-    intentos = [
-        ("GGAL.BA", "GGAL", 10),
-        ("BMA.BA", "BMA", 1),
-        ("YPF.BA", "YPF", 1)
-    ]
+    df_tc, par, _, _ = serie_tc_cacheada()
     
-    for ticker_ba, ticker_us, multiplicador in intentos:
-        try:
-            stock_ba = yf.download(ticker_ba, period="5d", progress=False)
-            stock_us = yf.download(ticker_us, period="5d", progress=False)
-            
-            if not stock_ba.empty and not stock_us.empty:
-                precio_ba = float(stock_ba['Close'].iloc[-1])
-                precio_us = float(stock_us['Close'].iloc[-1])
-                tipo_cambio = float((precio_ba / precio_us) * multiplicador)
-                
-                return tipo_cambio, precio_ba, precio_us
-                
-        except Exception as e:
-            continue
+    if df_tc is not None and not df_tc.empty:
+        ultimo = df_tc.iloc[-1]
+        return float(ultimo['TC']), float(ultimo['BA']), float(ultimo['US']), par
     
-    return None, None, None
+    try:
+        return sin_repetir_falla(obtener_tc_reciente, vigencia_datos)
+    except Exception:
+        return None, None, None, None
 
-# Función para calcular RSI
-def calcular_rsi(precios, periodo=14):
+# Función para convertir precios en ARS a USD
+def convertir_a_usd(close_ars, volume, df_tc):
     """
-    Calcula el RSI (Relative Strength Index)
+    Convierte a USD con la serie de TC, o con el TC actual fijo si df_tc es None
     """
-    deltas = precios.diff()
-    ganancias = deltas.where(deltas > 0, 0)
-    perdidas = -deltas.where(deltas < 0, 0)
+    tc_fijo = obtener_tipo_cambio_actual()[0] if df_tc is None else None
+    return nucleo.convertir_a_usd(close_ars, volume, df_tc, tc_fijo)
+
+# Función para obtener datos de una acción en USD
+@medir_cache
+@st.cache_data(max_entries=256, hash_funcs={nucleo.SerieTC: lambda serie: serie.clave})
+def obtener_datos_accion_usd(ticker, serie_tc, vigencia):
+    """
+    Obtiene datos históricos de una acción argentina y los convierte a USD
+    serie_tc es una SerieTC (o None para usar TC fijo); la cache usa su clave y la vigencia
+    Siempre cubre la ventana máxima; cada ventana se recorta con nucleo.recortar_ventana
+    Sin datos lanza LookupError (y si la descarga falla, su excepción)
+    """
+    tiempos.anotar(cache="fallo", ticker=ticker)
+    ticker_ba = f"{ticker}.BA"
     
-    avg_ganancias = ganancias.rolling(window=periodo).mean()
-    avg_perdidas = perdidas.rolling(window=periodo).mean()
+    # Leer del almacén local, descargando solo las ruedas que faltan
+    df = nucleo.descargar_acciones([ticker_ba]).get(ticker_ba)
     
-    rs = avg_ganancias / avg_perdidas
-    rsi = 100 - (100 / (1 + rs))
+    if df is None:
+        raise LookupError(nucleo.motivo_sin_datos(ticker_ba))
     
-    return rsi
+    df_tc = serie_tc.df if serie_tc is not None else None
+    df_combined = convertir_a_usd(df['Close'], df['Volume'], df_tc)
+    if df_combined is None:
+        raise LookupError("sin tipo de cambio para convertir a USD")
+    
+    return df_combined, ticker_ba
 
-# Función para obtener datos de una acción en USD
-@st.cache_data(ttl=300)
-def obtener_datos_accion_usd(ticker, df_tc, periodo_dias=90):
+# Función para calcular el RSI de todas las acciones a la vez
+@medir_cache
+@st.cache_data(max_entries=512)
+def calcular_rsi_lote(versiones, _dfs, metodo="simple", par_tc=None):
     """
-    Obtiene datos históricos de una acción argentina y los convierte a USD
+    Calcula el RSI en ARS y USD de todas las acciones y todos los períodos
+    del slider (ver nucleo.rsi_acciones)
+    Se cachea por la versión de los datos de cada ticker (sin hashear los
+    DataFrames), así mover "Período RSI" es solo una búsqueda
+    Con el método "wilder" cada acción retoma su estado incremental guardado
+    Retorna {ticker: (rsi_ars, rsi_usd)} con una columna por período
     """
-    try:
-        ticker_ba = f"{ticker}.BA"
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=periodo_dias + 30)
-        
-        # Usar yf.download en lugar de Ticker
-        df = yf.download(ticker_ba, start=start_date, end=end_date, progress=False)
-        
-        if df.empty:
-            return None, None
-        
-        # Extraer columnas correctamente
-        if isinstance(df.columns, pd.MultiIndex):
-            close_ars = df['Close'].iloc[:, 0] if df['Close'].ndim > 1 else df['Close']
-            volume = df['Volume'].iloc[:, 0] if 'Volume' in df.columns and df['Volume'].ndim > 1 else (df['Volume'] if 'Volume' in df.columns else pd.Series([0]*len(df), index=df.index))
-        else:
-            close_ars = df['Close']
-            volume = df['Volume'] if 'Volume' in df.columns else pd.Series([0]*len(df), index=df.index)
+    tiempos.anotar(cache="fallo", tickers=len(_dfs))
+    return nucleo.rsi_acciones(_dfs, metodo, par_tc)
+
+# Función para preparar los datos de una acción
+def preparar_accion(ticker, serie_tc, datos=None):
+    """
+    Obtiene la historia de una acción convertida a USD
+    Si se pasan datos ya descargados (Close/Volume en ARS) no se vuelve a descargar
+    Retorna (df, ticker_completo) o (None, None)
+    """
+    with tiempos.medir("accion.preparar", ticker=ticker, lote=datos is not None):
+        if datos is not None:
+            df_tc = serie_tc.df if serie_tc is not None else None
+            return convertir_a_usd(datos['Close'], datos['Volume'], df_tc), f"{ticker}.BA"
         
-        # Si df_tc es None, usar TC fijo actual
-        if df_tc is None:
-            tc_actual, _, _ = obtener_tipo_cambio_actual()
-            if tc_actual is None:
-                return None, None
+        return obtener_datos_accion_usd(ticker, serie_tc, vigencia_datos)
+
+# Función para analizar varias acciones en paralelo
+def analizar_acciones(tickers, serie_tc, periodo_rsi=14, periodo_dias=90, lote=None, max_workers=8, al_completar=None, metodo_rsi="simple"):
+    """
+    Analiza varias acciones: los datos se preparan en un pool de hilos acotado
+    (si un ticker falla o tarda, el resto sigue) y cada acción se resume apenas
+    llega, así los resultados se pueden mostrar a medida que se completan
+    al_completar(ticker, completados, resultados, errores) se llama después de cada ticker
+    Retorna las acciones preparadas {ticker: (ticker_completo, df, rsi_ars, rsi_usd)}
+    con la historia completa y el RSI de todos los períodos (ver resumir_acciones),
+    y un dict ticker -> error
+    """
+    lote = lote or {}
+    preparados = {}
+    resultados = []
+    errores = {}
+    errores_ventana = {}
+    par_tc = serie_tc.par[0] if serie_tc is not None else "fijo"
+    
+    # Los hilos del pool comparten el contexto de la sesión (cache y mensajes)
+    # y cada tarea corre con una copia del contexto para sumar sus tiempos al registro
+    ctx = get_script_run_ctx()
+    
+    def inicializar_hilo():
+        add_script_run_ctx(threading.current_thread(), ctx)
+    
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=inicializar_hilo) as pool:
+        futuros = {
+            pool.submit(contextvars.copy_context().run, preparar_accion, ticker, serie_tc, lote.get(f"{ticker}.BA")): ticker
+            for ticker in tickers
+        }
+        
+        for completados, futuro in enumerate(as_completed(futuros), start=1):
+            ticker = futuros[futuro]
+            try:
+                df, ticker_completo = futuro.result()
+                if df is None or df.empty:
+                    errores[ticker] = nucleo.motivo_sin_datos(f"{ticker}.BA")
+                else:
+                    # RSI en ARS y USD de todos los períodos en una sola llamada (cacheada por ticker)
+                    versiones = ((ticker, nucleo.version_datos(df, serie_tc)),)
+                    rsi_ars, rsi_usd = calcular_rsi_lote(versiones, {ticker: df}, metodo_rsi, par_tc)[ticker]
+                    preparados[ticker] = (ticker_completo, df, rsi_ars, rsi_usd)
+                    with tiempos.medir("accion.resumen", ticker=ticker):
+                        resultado = nucleo.resumir_accion(ticker, ticker_completo, df, rsi_ars, rsi_usd, periodo_rsi, periodo_dias)
+                    if resultado:
+                        resultados.append(resultado)
+                    else:
+                        errores_ventana[ticker] = "sin datos en la ventana"
+            except Exception as e:
+                errores[ticker] = str(e)
             
-            df_combined = pd.DataFrame({
-                'Close_ARS': close_ars,
-                'Volume': volume,
-                'TC': float(tc_actual)
-            }, index=close_ars.index)
+            if al_completar is not None:
+                al_completar(ticker, completados, resultados, {**errores, **errores_ventana})
+    
+    return preparados, errores
+
+# Función para resumir las acciones ya preparadas
+def resumir_acciones(preparados, periodo_rsi, periodo_dias):
+    """
+    Resume cada acción preparada (ver analizar_acciones) con el período de RSI
+    y la ventana elegidos: es solo elegir una columna y recortar en memoria,
+    así mover los sliders no recalcula ni descarga nada
+    Retorna los resultados y un dict ticker -> error de las que no tienen datos en la ventana
+    """
+    resultados = []
+    errores = {}
+    for ticker, (ticker_completo, df, rsi_ars, rsi_usd) in preparados.items():
+        resultado = nucleo.resumir_accion(ticker, ticker_completo, df, rsi_ars, rsi_usd, periodo_rsi, periodo_dias)
+        if resultado:
+            resultados.append(resultado)
         else:
-            # Crear DataFrame combinado
-            df_combined = pd.DataFrame({
-                'Close_ARS': close_ars,
-                'Volume': volume
-            }, index=close_ars.index)
-            
-            # Mergear con tipo de cambio
-            df_combined = df_combined.join(df_tc[['TC']], how='left')
-            
-            # Forward/backward fill para días sin TC
-            df_combined['TC'] = df_combined['TC'].ffill().bfill()
-        
-        # Calcular precio en USD
-        df_combined['Close_USD'] = df_combined['Close_ARS'] / df_combined['TC']
-        
-        # Eliminar filas con NaN
-        df_combined = df_combined.dropna()
-        
-        return df_combined, ticker_ba
-        
-    except Exception as e:
-        st.warning(f"Error obteniendo datos de {ticker}: {e}")
-        return None, None
+            errores[ticker] = "sin datos en la ventana"
+    return resultados, errores
 
-# Función principal de análisis
-def analizar_accion(ticker, df_tc, periodo_rsi=14):
+# Formato de las columnas de la tabla de resultados (solo al mostrarla; los datos quedan numéricos)
+FORMATO_COLUMNAS = {
+    'Precio ARS': st.column_config.NumberColumn(format="$%.2f"),
+    'Precio USD': st.column_config.NumberColumn(format="$%.2f"),
+    'RSI (ARS)': st.column_config.NumberColumn(format="%.2f"),
+    'RSI (USD)': st.column_config.NumberColumn(format="%.2f"),
+    'Diferencia': st.column_config.NumberColumn(format="%.2f")
+}
+
+# Sección de gráficos detallados
+@st.fragment
+def mostrar_graficos_detallados(resultados):
     """
-    Analiza una acción y retorna sus métricas
+    Gráfico, métricas y análisis de la acción elegida
+    Es un fragmento: elegir otra acción re-ejecuta solo esta sección,
+    leyendo los resultados ya calculados
     """
-    df, ticker_completo = obtener_datos_accion_usd(ticker, df_tc)
+    st.header("📊 Gráficos Detallados")
     
-    if df is None or df.empty:
-        return None
+    ticker_graficar = st.selectbox(
+        "Selecciona una acción para ver detalle:",
+        [r['ticker'] for r in resultados]
+    )
     
-    # Calcular RSI en ARS
-    df['RSI_ARS'] = calcular_rsi(df['Close_ARS'], periodo_rsi)
-    
-    # Calcular RSI en USD (¡ESTO ES LO IMPORTANTE!)
-    df['RSI_USD'] = calcular_rsi(df['Close_USD'], periodo_rsi)
-    
-    # Valores actuales
-    precio_ars = df['Close_ARS'].iloc[-1]
-    precio_usd = df['Close_USD'].iloc[-1]
-    tc_actual = df['TC'].iloc[-1]
-    rsi_ars = df['RSI_ARS'].iloc[-1]
-    rsi_usd = df['RSI_USD'].iloc[-1]
-    
-    return {
-        'ticker': ticker,
-        'ticker_completo': ticker_completo,
-        'precio_ars': precio_ars,
-        'precio_usd': precio_usd,
-        'tc': tc_actual,
-        'rsi_ars': rsi_ars,
-        'rsi_usd': rsi_usd,
-        'df': df
-    }
+    resultado_sel = next(r for r in resultados if r['ticker'] == ticker_graficar)
+    df_grafico = resultado_sel['df']
+    
+    # Historias largas: WebGL y reducción de puntos (conserva forma y cruces de 30/70)
+    # El máximo de puntos sale del ancho con que se muestra el gráfico reducido
+    ancho_grafico = graficos.ANCHO_GRAFICO_PX
+    max_puntos = graficos.presupuesto_puntos(ancho_grafico)
+    usar_webgl = len(df_grafico) > max_puntos
+    
+    if usar_webgl:
+        # Acotar el rango muestra más detalle; con pocos puntos se grafica todo
+        desde, hasta = st.slider(
+            "Rango de fechas:",
+            min_value=df_grafico.index[0].to_pydatetime(),
+            max_value=df_grafico.index[-1].to_pydatetime(),
+            value=(df_grafico.index[0].to_pydatetime(), df_grafico.index[-1].to_pydatetime()),
+            format="YYYY-MM-DD"
+        )
+        resolucion_completa = st.checkbox("Resolución completa", value=False)
+        
+        df_grafico = df_grafico.loc[desde:hasta]
+        total_puntos = len(df_grafico)
+        
+        if not resolucion_completa:
+            df_grafico = graficos.reducir_para_grafico(
+                df_grafico,
+                ['Close_USD', 'RSI_USD', 'RSI_ARS', 'TC'],
+                max_puntos,
+                columnas_con_niveles=['RSI_USD', 'RSI_ARS']
+            )
+        
+        st.caption(f"Mostrando {len(df_grafico)} de {total_puntos} puntos (WebGL)")
+    
+    with tiempos.medir("grafico.figura", ticker=ticker_graficar, puntos=len(df_grafico), webgl=usar_webgl):
+        fig = graficos.figura_detalle(
+            df_grafico, ticker_graficar, webgl=usar_webgl,
+            ancho=ancho_grafico if usar_webgl else None
+        )
+    
+    with tiempos.medir("grafico.envio", ticker=ticker_graficar):
+        st.plotly_chart(fig, use_container_width=not usar_webgl)
+    
+    # Métricas adicionales
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric("Precio (ARS)", f"${resultado_sel['precio_ars']:.2f}")
+    
+    with col2:
+        st.metric("Precio (USD)", f"${resultado_sel['precio_usd']:.2f}")
+    
+    with col3:
+        st.metric("RSI (USD)", f"{resultado_sel['rsi_usd']:.2f}")
+    
+    with col4:
+        st.metric("RSI (ARS)", f"{resultado_sel['rsi_ars']:.2f}")
+    
+    with col5:
+        diff_rsi = resultado_sel['rsi_usd'] - resultado_sel['rsi_ars']
+        st.metric("Diferencia RSI", f"{diff_rsi:.2f}")
+    
+    # Análisis adicional
+    st.markdown("---")
+    st.subheader("📈 Análisis")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**Interpretación RSI (USD):**")
+        if resultado_sel['rsi_usd'] < 30:
+            st.success("🟢 **SOBREVENTA** - Posible oportunidad de compra")
+        elif resultado_sel['rsi_usd'] > 70:
+            st.error("🔴 **SOBRECOMPRA** - Posible oportunidad de venta")
+        else:
+            st.info("🟡 **NEUTRAL** - Sin señales extremas")
+    
+    with col2:
+        st.markdown("**Efecto de la devaluación:**")
+        if abs(diff_rsi) < 5:
+            st.info("Diferencia mínima entre RSI USD y ARS")
+        elif diff_rsi > 5:
+            st.warning("RSI en USD es más alto - La acción subió más que la devaluación")
+        else:
+            st.warning("RSI en USD es más bajo - La acción no siguió el ritmo de la devaluación")
 
 # Sidebar con configuración
 st.sidebar.header("⚙️ Configuración")
 
 periodo_rsi = st.sidebar.slider(
     "Período RSI",
-    min_value=7,
-    max_value=30,
+    min_value=nucleo.PERIODO_RSI_MINIMO,
+    max_value=nucleo.PERIODO_RSI_MAXIMO,
     value=14,
     help="Cantidad de períodos para calcular el RSI"
 )
 
+metodo_rsi = st.sidebar.radio(
+    "Método RSI",
+    list(METODOS_RSI),
+    help="Media simple: promedio móvil de ganancias y pérdidas. Wilder: suavizado exponencial estándar, se actualiza rueda a rueda"
+)
+
 periodo_dias = st.sidebar.slider(
     "Días históricos",
     min_value=30,
-    max_value=365,
+    max_value=nucleo.DIAS_MAXIMOS,
     value=90,
     help="Cantidad de días de historia a analizar"
 )
 
+max_descargas = st.sidebar.slider(
+    "Descargas en paralelo",
+    min_value=1,
+    max_value=16,
+    value=8,
+    help="Cantidad de acciones que se procesan al mismo tiempo (1 = secuencial)"
+)
+
 # Lista de tickers predefinidos
 st.sidebar.header("📋 Acciones Predefinidas")
 tickers_predefinidos = ["GGAL", "YPF", "BBAR", "BMA", "CEPU", "EDN", "LOMA", "PAM", "YPFD", "TXAR", "ALUA", "COME", "CRES"]
@@ -261,6 +508,15 @@ else:
         height=150
     )
     tickers_seleccionados = [t.strip().upper() for t in tickers_input.split('\n') if t.strip()]
+    
+    # Los tickers sin cotizaciones se avisan y se omiten antes de calcular
+    if tickers_seleccionados:
+        with st.sidebar:
+            with st.spinner("Validando tickers..."):
+                tickers_invalidos = validar_tickers(tickers_seleccionados)
+        if tickers_invalidos:
+            st.sidebar.warning("⚠️ Sin cotizaciones (se omiten): " + ", ".join(tickers_invalidos))
+            tickers_seleccionados = [t for t in tickers_seleccionados if t not in tickers_invalidos]
 
 # Sección principal
 col1, col2, col3 = st.columns([2, 1, 1])
@@ -270,13 +526,23 @@ with col1:
     
     if st.button("🔄 Actualizar Datos", type="secondary"):
         st.cache_data.clear()
+        st.session_state.pop('resultados', None)
     
     with st.spinner("Obteniendo tipo de cambio actual..."):
-        tc_actual, precio_ba, precio_us = obtener_tipo_cambio_actual()
+        tc_actual, precio_ba, precio_us, par_tc_actual = obtener_tipo_cambio_actual()
     
+    usar_tc_fijo = False
     if tc_actual is not None:
+        serie_vigente = serie_tc_vigente()
+        version_tc_actual = serie_vigente.clave if serie_vigente is not None else None
+        ticker_ba_tc, ticker_us_tc, _ = par_tc_actual
         st.success(f"**TC Actual: ${tc_actual:.2f}**")
-        st.caption(f"GGAL.BA: ${precio_ba:.2f} | GGAL (NASDAQ): USD ${precio_us:.2f}")
+        st.caption(f"{ticker_ba_tc}: ${precio_ba:.2f} | {ticker_us_tc} (NASDAQ): USD ${precio_us:.2f}")
+        
+        # Sin serie histórica solo se puede calcular con el TC actual fijo
+        if serie_vigente is None:
+            st.warning("⚠️ No se pudo obtener el TC histórico (este TC sale de las últimas ruedas)")
+            usar_tc_fijo = st.checkbox("Usar el TC actual para todo el período")
     else:
         st.error("No se pudo obtener el tipo de cambio")
         st.stop()
@@ -295,86 +561,111 @@ st.divider()
 # Sección de cálculo
 st.header("🎯 Calcular RSI en USD")
 
+# Clave de los datos guardados en la sesión (los sliders de período y días no
+# cambian los datos: los resultados se arman de nuevo en cada ejecución)
+clave_resultados = (tuple(tickers_seleccionados), METODOS_RSI[metodo_rsi])
+
 if st.button("🚀 CALCULAR RSI DE TODAS LAS ACCIONES", type="primary", use_container_width=True):
     
     if not tickers_seleccionados:
         st.warning("⚠️ No hay acciones seleccionadas")
         st.stop()
     
-    # Obtener tipo de cambio histórico primero
+    # El TC histórico sale de la misma serie que ya se cargó para el TC actual
     with st.spinner("Obteniendo tipo de cambio histórico de GGAL..."):
-        df_tc = obtener_tipo_cambio_historico(periodo_dias + 30)
+        serie_tc = obtener_tipo_cambio_historico()
     
-    # Si no se pudo obtener TC histórico, ofrecer usar TC fijo
-    if df_tc is None or df_tc.empty:
-        st.warning("⚠️ No se pudo obtener TC histórico. ¿Usar tipo de cambio actual para todo el período?")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            usar_tc_fijo = st.button("Sí, usar TC fijo")
-        with col2:
-            cancelar = st.button("No, cancelar")
-        
-        if usar_tc_fijo:
-            tc_actual, _, _ = obtener_tipo_cambio_actual()
-            if tc_actual is not None:
-                st.info(f"Usando TC fijo: ${tc_actual:.2f}")
-                df_tc = None  # None indica que usaremos TC fijo
-            else:
-                st.error("❌ No se pudo obtener ni TC histórico ni actual.")
-                st.stop()
-        elif cancelar:
+    # Descargar todas las acciones en una sola consulta
+    simbolos = tuple(dict.fromkeys(f"{t}.BA" for t in tickers_seleccionados))
+    
+    with st.spinner(f"Descargando {len(simbolos)} cotizaciones..."):
+        try:
+            lote = sin_repetir_falla(descargar_lote, simbolos, vigencia_datos)
+        except Exception as e:
+            # Cada acción se vuelve a intentar por separado
+            st.warning(f"Error en la descarga conjunta: {e}")
+            lote = {}
+    
+    # Si no se pudo obtener TC histórico, solo se sigue con el TC fijo elegido arriba
+    if serie_tc is None or serie_tc.df.empty:
+        if not usar_tc_fijo:
+            st.warning("⚠️ No se pudo obtener TC histórico. Marcá \"Usar el TC actual para todo el período\" para calcular con TC fijo.")
             st.stop()
-        else:
-            st.stop()  # Si no presionó ningún botón, detener
+        
+        st.info(f"Usando TC fijo: ${tc_actual:.2f}")
+        serie_tc = None  # None indica que usaremos TC fijo
     else:
-        st.success(f"✅ TC histórico obtenido ({len(df_tc)} días)")
+        st.success(f"✅ TC histórico obtenido ({len(serie_tc.df)} días)")
     
-    # Crear contenedor para resultados
-    resultados = []
-    
-    # Progress bar
+    # Progress bar y tabla que se completa a medida que llegan los tickers
     progress_bar = st.progress(0)
     status_text = st.empty()
+    tabla_parcial = st.empty()
     
-    # Procesar cada ticker
-    for idx, ticker in enumerate(tickers_seleccionados):
-        status_text.text(f"Procesando {ticker}... ({idx + 1}/{len(tickers_seleccionados)})")
-        
-        resultado = analizar_accion(ticker, df_tc, periodo_rsi)
-        
-        if resultado:
-            resultados.append(resultado)
-        
-        progress_bar.progress((idx + 1) / len(tickers_seleccionados))
+    def actualizar_progreso(ticker, completados, resultados, errores):
+        status_text.text(f"Procesado {ticker} ({completados}/{len(tickers_seleccionados)})")
+        progress_bar.progress(completados / len(tickers_seleccionados))
+        tabla_parcial.dataframe(
+            nucleo.tabla_resultados(resultados, errores),
+            use_container_width=True,
+            hide_index=True,
+            column_config=FORMATO_COLUMNAS
+        )
+    
+    # Procesar los tickers en paralelo; los que no vinieron en la descarga conjunta se descargan por separado
+    preparados, errores = analizar_acciones(
+        tickers_seleccionados, serie_tc, periodo_rsi, periodo_dias,
+        lote=lote,
+        max_workers=max_descargas,
+        al_completar=actualizar_progreso,
+        metodo_rsi=METODOS_RSI[metodo_rsi]
+    )
     
     status_text.empty()
     progress_bar.empty()
+    tabla_parcial.empty()
+    
+    # Guardar en la sesión la historia y el RSI de todos los períodos de cada acción:
+    # cambiar de gráfico, de período o de ventana no recalcula nada
+    st.session_state['resultados'] = {
+        'clave': clave_resultados,
+        'version_tc': serie_tc.clave if serie_tc is not None else None,
+        'preparados': preparados,
+        'errores': errores
+    }
+
+# Mostrar resultados guardados (sobreviven a los reruns de la página)
+guardado = st.session_state.get('resultados')
+
+if guardado is not None and guardado['clave'] != clave_resultados:
+    st.info("ℹ️ La configuración cambió. Presioná CALCULAR para ver los resultados actualizados.")
+elif guardado is not None:
+    with tiempos.medir("resumen", tickers=len(guardado['preparados'])):
+        resultados, errores_ventana = resumir_acciones(guardado['preparados'], periodo_rsi, periodo_dias)
+    errores = {**guardado['errores'], **errores_ventana}
+    
+    if guardado['version_tc'] != version_tc_actual:
+        st.info("ℹ️ Hay cotizaciones más nuevas. Presioná CALCULAR para actualizar los resultados.")
     
-    # Mostrar resultados
-    if resultados:
+    if errores:
+        st.warning("⚠️ No se pudieron procesar: " + ", ".join(f"{t} ({e})" for t, e in errores.items()))
+    
+    if not resultados:
+        st.error("❌ No se pudieron procesar las acciones")
+    else:
         st.success(f"✅ Se procesaron {len(resultados)} acciones correctamente")
         
-        # Crear DataFrame con resultados
-        df_resultados = pd.DataFrame([
-            {
-                'Ticker': r['ticker'],
-                'Precio ARS': f"${r['precio_ars']:.2f}",
-                'Precio USD': f"${r['precio_usd']:.2f}",
-                'RSI (ARS)': f"{r['rsi_ars']:.2f}",
-                'RSI (USD)': f"{r['rsi_usd']:.2f}",
-                'Diferencia': f"{(r['rsi_usd'] - r['rsi_ars']):.2f}",
-                'Señal': '🟢 Sobreventa' if r['rsi_usd'] < 30 else ('🔴 Sobrecompra' if r['rsi_usd'] > 70 else '🟡 Neutral')
-            }
-            for r in resultados
-        ])
-        
-        # Mostrar tabla
-        st.dataframe(
-            df_resultados,
-            use_container_width=True,
-            hide_index=True
-        )
+        # Crear DataFrame con resultados (los que fallaron quedan al final)
+        with tiempos.medir("tabla", filas=len(resultados) + len(errores)):
+            df_resultados = nucleo.tabla_resultados(resultados, errores)
+            
+            # Mostrar tabla
+            st.dataframe(
+                df_resultados,
+                use_container_width=True,
+                hide_index=True,
+                column_config=FORMATO_COLUMNAS
+            )
         
         # Explicación de las columnas
         with st.expander("ℹ️ ¿Qué significa cada columna?"):
@@ -395,138 +686,36 @@ if st.button("🚀 CALCULAR RSI DE TODAS LAS ACCIONES", type="primary", use_cont
         
         # Gráficos individuales
         st.divider()
-        st.header("📊 Gráficos Detallados")
-        
-        ticker_graficar = st.selectbox(
-            "Selecciona una acción para ver detalle:",
-            [r['ticker'] for r in resultados]
-        )
-        
-        resultado_sel = next(r for r in resultados if r['ticker'] == ticker_graficar)
-        df_grafico = resultado_sel['df']
-        
-        # Crear subplots
-        fig = make_subplots(
-            rows=3, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.05,
-            subplot_titles=(
-                f'{ticker_graficar} - Precio en USD', 
-                'RSI en USD vs RSI en ARS',
-                'Tipo de Cambio Implícito'
-            ),
-            row_heights=[0.4, 0.35, 0.25]
-        )
-        
-        # Subplot 1: Precio en USD
-        fig.add_trace(
-            go.Scatter(
-                x=df_grafico.index,
-                y=df_grafico['Close_USD'],
-                name='Precio USD',
-                line=dict(color='blue', width=2)
-            ),
-            row=1, col=1
-        )
-        
-        # Subplot 2: RSI USD y ARS
-        fig.add_trace(
-            go.Scatter(
-                x=df_grafico.index,
-                y=df_grafico['RSI_USD'],
-                name='RSI (USD)',
-                line=dict(color='green', width=2)
-            ),
-            row=2, col=1
-        )
-        
-        fig.add_trace(
-            go.Scatter(
-                x=df_grafico.index,
-                y=df_grafico['RSI_ARS'],
-                name='RSI (ARS)',
-                line=dict(color='orange', width=2, dash='dash')
-            ),
-            row=2, col=1
-        )
-        
-        # Líneas de referencia RSI
-        fig.add_hline(y=70, line_dash="dot", line_color="red", opacity=0.5, row=2, col=1)
-        fig.add_hline(y=30, line_dash="dot", line_color="green", opacity=0.5, row=2, col=1)
-        
-        # Subplot 3: Tipo de Cambio
-        fig.add_trace(
-            go.Scatter(
-                x=df_grafico.index,
-                y=df_grafico['TC'],
-                name='TC GGAL',
-                line=dict(color='purple', width=2),
-                fill='tozeroy'
-            ),
-            row=3, col=1
-        )
-        
-        # Layout
-        fig.update_xaxes(title_text="Fecha", row=3, col=1)
-        fig.update_yaxes(title_text="USD", row=1, col=1)
-        fig.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
-        fig.update_yaxes(title_text="ARS/USD", row=3, col=1)
-        
-        fig.update_layout(
-            height=800,
-            hovermode='x unified',
-            showlegend=True
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Métricas adicionales
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        with col1:
-            st.metric("Precio (ARS)", f"${resultado_sel['precio_ars']:.2f}")
-        
-        with col2:
-            st.metric("Precio (USD)", f"${resultado_sel['precio_usd']:.2f}")
-        
-        with col3:
-            st.metric("RSI (USD)", f"{resultado_sel['rsi_usd']:.2f}")
-        
-        with col4:
-            st.metric("RSI (ARS)", f"{resultado_sel['rsi_ars']:.2f}")
-        
-        with col5:
-            diff_rsi = resultado_sel['rsi_usd'] - resultado_sel['rsi_ars']
-            st.metric("Diferencia RSI", f"{diff_rsi:.2f}")
-        
-        # Análisis adicional
-        st.markdown("---")
-        st.subheader("📈 Análisis")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("**Interpretación RSI (USD):**")
-            if resultado_sel['rsi_usd'] < 30:
-                st.success("🟢 **SOBREVENTA** - Posible oportunidad de compra")
-            elif resultado_sel['rsi_usd'] > 70:
-                st.error("🔴 **SOBRECOMPRA** - Posible oportunidad de venta")
-            else:
-                st.info("🟡 **NEUTRAL** - Sin señales extremas")
-        
-        with col2:
-            st.markdown("**Efecto de la devaluación:**")
-            if abs(diff_rsi) < 5:
-                st.info("Diferencia mínima entre RSI USD y ARS")
-            elif diff_rsi > 5:
-                st.warning("RSI en USD es más alto - La acción subió más que la devaluación")
-            else:
-                st.warning("RSI en USD es más bajo - La acción no siguió el ritmo de la devaluación")
-    
-    else:
-        st.error("❌ No se pudieron procesar las acciones")
+        mostrar_graficos_detallados(resultados)
 
 # Footer
 st.divider()
 st.caption("💡 **Nota**: El RSI en USD considera el tipo de cambio implícito histórico, dando una visión más precisa del momentum real sin el efecto de la devaluación.")
-st.caption(f"🕒 Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
\ No newline at end of file
+st.caption(f"🕒 Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+st.caption(f"🏛️ {calendario.descripcion()}")
+
+# Contadores de descargas (límite de ritmo, reintentos y circuitos), acumulados en el proceso
+with st.sidebar.expander("📡 Descargas"):
+    st.json(descargas.estadisticas())
+
+# Tiempos por etapa de esta ejecución (también quedan en el log "rsi_usd.tiempos")
+with st.sidebar.expander("⚡ Rendimiento"):
+    if registro_tiempos:
+        df_tiempos = pd.DataFrame(registro_tiempos)
+        resumen_etapas = df_tiempos.groupby('etapa')['ms'].agg(['count', 'sum', 'max']).round(1)
+        resumen_etapas.columns = ['Veces', 'Total (ms)', 'Máx (ms)']
+        st.dataframe(resumen_etapas.sort_values('Total (ms)', ascending=False))
+        
+        if 'cache' in df_tiempos:
+            aciertos = df_tiempos.dropna(subset=['cache']).groupby(['etapa', 'cache']).size().unstack(fill_value=0)
+            st.caption("Cache (aciertos / fallos)")
+            st.dataframe(aciertos)
+        
+        st.caption("Detalle")
+        st.dataframe(df_tiempos, hide_index=True)
+    else:
+        st.caption("Sin etapas medidas en esta ejecución")
+
+# Tiempo de esta ejecución del script (la primera del proceso es el arranque en frío)
+duracion_ejecucion, duracion_arranque = tiempos.fin_ejecucion(inicio_ejecucion)
+st.caption(f"⏱️ Script: {duracion_ejecucion * 1000:.0f} ms · arranque en frío: {duracion_arranque * 1000:.0f} ms")
@@ -0,0 +1,309 @@
+"""
+Benchmarks del pipeline: TC → descarga → conversión → RSI → tabla → gráfico
+
+Corre el pipeline de nucleo.py contra un ProveedorLocal (sin internet),
+con datos sintéticos o con fixtures grabados, para 1/13/100/500 tickers y
+ventanas de 30/365/3650 días. Por cada etapa informa el tiempo (mediana de
+las repeticiones), el pico de memoria, la memoria que queda asignada al
+terminar la etapa y la cantidad de bloques que quedan asignados
+(tracemalloc, en una corrida aparte para no distorsionar los tiempos). Cada repetición arranca con un almacén vacío, así la primera
+descarga es siempre en frío.
+
+Uso (desde la raíz del repositorio):
+
+    python benchmarks/pipeline.py                      # matriz completa, datos sintéticos
+    python benchmarks/pipeline.py --rapido             # 1 y 13 tickers, 30 y 365 días
+    python benchmarks/pipeline.py --fixtures fixtures  # fixtures grabados con proveedores.py
+    python benchmarks/pipeline.py --guardar referencia # guarda baselines/referencia.json
+    python benchmarks/pipeline.py --comparar referencia
+
+Con --comparar se marcan las etapas más lentas que la línea de base (por
+encima de --umbral) y el comando termina con código 1 si hay regresiones.
+Las líneas de base dependen de la máquina: comparar siempre en la misma.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import almacen  # noqa: E402
+import descargas  # noqa: E402
+import graficos  # noqa: E402
+import nucleo  # noqa: E402
+import proveedores  # noqa: E402
+
+CARPETA_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+TICKERS = (1, 13, 100, 500)
+DIAS = (30, 365, 3650)
+TICKERS_RAPIDO = (1, 13)
+DIAS_RAPIDO = (30, 365)
+
+ETAPAS = ("tc", "descarga", "descarga_cache", "conversion", "rsi", "rsi_wilder", "tabla", "grafico")
+
+# Diferencias de tiempo menores a esto son ruido y no cuentan como regresión
+SEGUNDOS_MINIMOS_REGRESION = 0.05
+
+
+# Función para generar fixtures sintéticos
+def generar_sinteticos(carpeta, tickers, dias, semilla=0):
+    """
+    Genera fixtures CSV con caminatas aleatorias para los pares de TC y los tickers,
+    con ruedas de lunes a viernes desde dias días atrás hasta hoy
+    Los precios en ARS de cada ticker salen de un precio en USD por un TC común
+    """
+    azar = np.random.default_rng(semilla)
+    fechas = pd.bdate_range(end=pd.Timestamp(datetime.now().date()), periods=max(int(dias * 5 / 7), 2), name='Date')
+    n = len(fechas)
+
+    def caminata(inicio, volatilidad):
+        return inicio * np.exp(np.cumsum(azar.normal(0, volatilidad, n)))
+
+    def guardar(simbolo, precios):
+        pd.DataFrame({'Close': precios, 'Volume': azar.integers(1_000, 1_000_000, n)}, index=fechas).to_csv(
+            os.path.join(carpeta, f"{simbolo}.csv"), index_label='Date'
+        )
+
+    os.makedirs(carpeta, exist_ok=True)
+    tc = caminata(1000.0, 0.01)
+    for ticker_ba, ticker_us, multiplicador in nucleo.PARES_TC:
+        usd = caminata(20.0, 0.02)
+        guardar(ticker_us, usd)
+        guardar(ticker_ba, usd * tc / multiplicador)
+
+    simbolos = [f"T{i:04d}.BA" for i in range(tickers)]
+    for simbolo in simbolos:
+        guardar(simbolo, caminata(5.0, 0.02) * tc)
+    return [s[:-3] for s in simbolos]
+
+
+# Función para preparar fixtures a partir de los grabados
+def copiar_grabados(origen, carpeta, tickers):
+    """
+    Copia los fixtures grabados de los pares de TC y arma tickers acciones
+    reutilizando las acciones grabadas (T0000.BA, T0001.BA, ... en ronda)
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    pares = {simbolo for par in nucleo.PARES_TC for simbolo in par[:2]}
+    archivos = sorted(os.listdir(origen))
+
+    for archivo in archivos:
+        if os.path.splitext(archivo)[0] in pares:
+            shutil.copy(os.path.join(origen, archivo), os.path.join(carpeta, archivo))
+
+    acciones = [a for a in archivos if os.path.splitext(a)[0].endswith(".BA")]
+    if not acciones:
+        raise SystemExit(f"No hay fixtures de acciones (*.BA) en {origen}")
+
+    simbolos = []
+    for i in range(tickers):
+        archivo = acciones[i % len(acciones)]
+        simbolo = f"T{i:04d}.BA"
+        shutil.copy(os.path.join(origen, archivo), os.path.join(carpeta, simbolo + os.path.splitext(archivo)[1]))
+        simbolos.append(simbolo[:-3])
+    return simbolos
+
+
+# Función para correr una vez todas las etapas
+def correr_etapas(tickers, dias, medir):
+    """
+    Corre el pipeline completo; medir(etapa, funcion) ejecuta y mide cada etapa
+    """
+    simbolos = tuple(f"{t}.BA" for t in tickers)
+
+    df_tc, par, digest, _ = medir("tc", nucleo.obtener_serie_tc)
+    serie_tc = nucleo.armar_serie_tc(df_tc, par, digest)
+    if serie_tc is None:
+        raise SystemExit("No se pudo armar la serie de TC con los fixtures")
+
+    lote = medir("descarga", lambda: nucleo.descargar_acciones(simbolos))
+    medir("descarga_cache", lambda: nucleo.descargar_acciones(simbolos))
+
+    dfs = medir("conversion", lambda: {
+        t: nucleo.convertir_a_usd(lote[f"{t}.BA"]['Close'], lote[f"{t}.BA"]['Volume'], serie_tc.df)
+        for t in tickers if f"{t}.BA" in lote
+    })
+
+    rsi = medir("rsi", lambda: nucleo.rsi_acciones(dfs, "simple"))
+    medir("rsi_wilder", lambda: nucleo.rsi_acciones(dfs, "wilder", par[0]))
+
+    def tabla():
+        resultados = [
+            nucleo.resumir_accion(t, f"{t}.BA", df, *rsi[t], 14, dias)
+            for t, df in dfs.items()
+        ]
+        resultados = [r for r in resultados if r]
+        return resultados, nucleo.tabla_resultados(resultados)
+
+    resultados, _ = medir("tabla", tabla)
+
+    def grafico():
+        df = resultados[0]['df']
+        max_puntos = graficos.presupuesto_puntos(graficos.ANCHO_GRAFICO_PX)
+        webgl = len(df) > max_puntos
+        if webgl:
+            df = graficos.reducir_para_grafico(
+                df, ['Close_USD', 'RSI_USD', 'RSI_ARS', 'TC'], max_puntos,
+                columnas_con_niveles=['RSI_USD', 'RSI_ARS']
+            )
+        # La serialización a JSON es lo que hace st.plotly_chart
+        return graficos.figura_detalle(
+            df, resultados[0]['ticker'], webgl=webgl,
+            ancho=graficos.ANCHO_GRAFICO_PX if webgl else None
+        ).to_json()
+
+    medir("grafico", grafico)
+
+
+# Función para tomar una foto de tracemalloc sin sus propios bloques
+def tomar_foto():
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+# Función para medir un caso (cantidad de tickers × días)
+def medir_caso(cantidad, dias, repeticiones, fixtures=None):
+    """
+    Retorna {etapa: {tiempo_s, pico_mb, neto_mb, bloques}} de un caso
+    """
+    tiempos = {etapa: [] for etapa in ETAPAS}
+    memoria = {}
+
+    # La ventana pedida más el calentamiento del RSI (como en nucleo)
+    nucleo.DIAS_DESCARGA = dias + nucleo.DIAS_CALENTAMIENTO
+    nucleo.DIAS_SERIE_TC = nucleo.DIAS_DESCARGA + 30
+
+    with tempfile.TemporaryDirectory() as temporal:
+        carpeta = os.path.join(temporal, "fixtures")
+        if fixtures is None:
+            tickers = generar_sinteticos(carpeta, cantidad, nucleo.DIAS_SERIE_TC)
+        else:
+            tickers = copiar_grabados(fixtures, carpeta, cantidad)
+
+        for repeticion in range(repeticiones + 1):
+            # Almacén vacío y proveedor nuevo en cada repetición
+            almacen.RUTA_ALMACEN = os.path.join(temporal, f"almacen_{repeticion}.sqlite")
+            proveedores.usar(proveedores.ProveedorLocal(carpeta))
+            con_memoria = repeticion == repeticiones
+
+            def medir(etapa, funcion):
+                if con_memoria:
+                    foto = tomar_foto()
+                    tracemalloc.reset_peak()
+                    antes = tracemalloc.get_traced_memory()[0]
+                    resultado = funcion()
+                    actual, pico = tracemalloc.get_traced_memory()
+                    bloques = sum(e.count_diff for e in tomar_foto().compare_to(foto, 'filename'))
+                    memoria[etapa] = ((pico - antes) / 2**20, (actual - antes) / 2**20, bloques)
+                else:
+                    inicio = time.perf_counter()
+                    resultado = funcion()
+                    tiempos[etapa].append(time.perf_counter() - inicio)
+                return resultado
+
+            if con_memoria:
+                tracemalloc.start()
+            try:
+                correr_etapas(tickers, dias, medir)
+            finally:
+                if con_memoria:
+                    tracemalloc.stop()
+
+    return {
+        etapa: {
+            'tiempo_s': statistics.median(tiempos[etapa]),
+            'pico_mb': memoria[etapa][0],
+            'neto_mb': memoria[etapa][1],
+            'bloques': memoria[etapa][2]
+        }
+        for etapa in ETAPAS
+    }
+
+
+# Función para comparar contra una línea de base
+def comparar(actual, base, umbral):
+    """
+    Retorna la lista de regresiones (caso, etapa, medida, base, actual)
+    """
+    regresiones = []
+    for caso, etapas in actual['casos'].items():
+        for etapa, valores in etapas.items():
+            anterior = base['casos'].get(caso, {}).get(etapa)
+            if anterior is None:
+                continue
+            if (valores['tiempo_s'] > anterior['tiempo_s'] * umbral
+                    and valores['tiempo_s'] - anterior['tiempo_s'] > SEGUNDOS_MINIMOS_REGRESION):
+                regresiones.append((caso, etapa, 'tiempo_s', anterior['tiempo_s'], valores['tiempo_s']))
+            if valores['pico_mb'] > anterior['pico_mb'] * umbral and valores['pico_mb'] - anterior['pico_mb'] > 1:
+                regresiones.append((caso, etapa, 'pico_mb', anterior['pico_mb'], valores['pico_mb']))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de RSI en USD (sin internet)")
+    parser.add_argument("--tickers", type=int, nargs="+", default=None, help=f"Cantidades de tickers (default: {TICKERS})")
+    parser.add_argument("--dias", type=int, nargs="+", default=None, help=f"Ventanas en días (default: {DIAS})")
+    parser.add_argument("--rapido", action="store_true", help=f"Solo {TICKERS_RAPIDO} tickers y {DIAS_RAPIDO} días")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por caso para el tiempo (default: 3)")
+    parser.add_argument("--fixtures", default=None, help="Carpeta de fixtures grabados (default: datos sintéticos)")
+    parser.add_argument("--guardar", default=None, help="Guardar los resultados como línea de base con este nombre")
+    parser.add_argument("--comparar", default=None, help="Comparar contra la línea de base con este nombre")
+    parser.add_argument("--umbral", type=float, default=1.5, help="Cociente actual/base que cuenta como regresión (default: 1.5)")
+    args = parser.parse_args(argv)
+
+    cantidades = args.tickers or (TICKERS_RAPIDO if args.rapido else TICKERS)
+    ventanas = args.dias or (DIAS_RAPIDO if args.rapido else DIAS)
+
+    # Sin límite de ritmo: se mide el código, no la espera al proveedor
+    descargas.PEDIDOS_POR_SEGUNDO = float("inf")
+    descargas.RAFAGA_PEDIDOS = float("inf")
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'datos': args.fixtures or "sintéticos",
+        'casos': {}
+    }
+
+    print(f"{'caso':>10} {'etapa':>15} {'tiempo_s':>10} {'pico_mb':>9} {'neto_mb':>9} {'bloques':>9}")
+    for cantidad in cantidades:
+        for dias in ventanas:
+            caso = f"{cantidad}x{dias}"
+            resultado['casos'][caso] = medir_caso(cantidad, dias, args.repeticiones, args.fixtures)
+            for etapa, valores in resultado['casos'][caso].items():
+                print(f"{caso:>10} {etapa:>15} {valores['tiempo_s']:>10.4f} {valores['pico_mb']:>9.2f} {valores['neto_mb']:>9.2f} {valores['bloques']:>9}")
+
+    if args.guardar:
+        os.makedirs(CARPETA_BASELINES, exist_ok=True)
+        ruta = os.path.join(CARPETA_BASELINES, f"{args.guardar}.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"Línea de base guardada en {ruta}")
+
+    if args.comparar:
+        with open(os.path.join(CARPETA_BASELINES, f"{args.comparar}.json"), encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultado, base, args.umbral)
+        for caso, etapa, medida, anterior, actual in regresiones:
+            print(f"REGRESIÓN {caso} {etapa} {medida}: {anterior:.4f} -> {actual:.4f} ({actual / anterior:.2f}x)")
+        if not regresiones:
+            print(f"Sin regresiones respecto de {args.comparar} (umbral {args.umbral}x)")
+        return 1 if regresiones else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Calendario de ruedas de BYMA y de NYSE/NASDAQ
+
+Las cotizaciones diarias solo cambian mientras un mercado está en rueda
+(más DEMORA_CIERRE, lo que tarda el proveedor en publicar el cierre
+definitivo). Con este calendario:
+
+- el almacén no vuelve a pedir la cola de un símbolo si su mercado no abrió
+  desde la última rueda cerrada guardada (fines de semana, noches)
+- las funciones cacheadas de app.py usan vigencia() como parte de la clave:
+  durante la rueda cambia cada CADENCIA_EN_RUEDA segundos y con los mercados
+  cerrados queda fija hasta la próxima apertura, así fuera de horario todo
+  sale de la cache
+
+La cadencia se configura con RSI_CADENCIA_RUEDA (segundos, default 300). Los
+feriados no se calculan: se pueden pasar como fechas separadas por coma en
+RSI_FERIADOS_BYMA y RSI_FERIADOS_US (sin ellos, un feriado cuesta solo una
+consulta vacía por símbolo y cadencia).
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Segundos entre actualizaciones mientras algún mercado está en rueda
+CADENCIA_EN_RUEDA = int(os.environ.get("RSI_CADENCIA_RUEDA", "300"))
+
+# Después del cierre el proveedor puede seguir corrigiendo la rueda del día
+DEMORA_CIERRE = timedelta(minutes=30)
+
+
+def _feriados(variable):
+    return frozenset(
+        date.fromisoformat(dia.strip())
+        for dia in os.environ.get(variable, "").split(",")
+        if dia.strip()
+    )
+
+
+@dataclass(frozen=True)
+class Mercado:
+    nombre: str
+    zona: ZoneInfo
+    apertura: time
+    cierre: time
+    feriados: frozenset = frozenset()
+
+
+# Horario de cada mercado en su zona horaria
+MERCADOS = {
+    "byma": Mercado("BYMA", ZoneInfo("America/Argentina/Buenos_Aires"), time(11, 0), time(17, 0), _feriados("RSI_FERIADOS_BYMA")),
+    "us": Mercado("NYSE/NASDAQ", ZoneInfo("America/New_York"), time(9, 30), time(16, 0), _feriados("RSI_FERIADOS_US"))
+}
+
+
+# Función para obtener la hora actual
+def ahora():
+    return datetime.now(timezone.utc)
+
+
+# Función para clasificar un símbolo por mercado
+def mercado(simbolo):
+    """
+    Retorna "byma" para los símbolos de Buenos Aires (.BA) y "us" para el resto
+    """
+    return "byma" if simbolo.endswith(".BA") else "us"
+
+
+def _es_rueda(datos_mercado, dia):
+    return dia.weekday() < 5 and dia not in datos_mercado.feriados
+
+
+def _apertura(datos_mercado, dia):
+    return datetime.combine(dia, datos_mercado.apertura, tzinfo=datos_mercado.zona)
+
+
+def _fin(datos_mercado, dia):
+    return datetime.combine(dia, datos_mercado.cierre, tzinfo=datos_mercado.zona) + DEMORA_CIERRE
+
+
+# Función para saber si un mercado está en rueda
+def en_rueda(nombre, momento=None):
+    """
+    True si el mercado está abierto (o cerró hace menos de DEMORA_CIERRE)
+    """
+    datos_mercado = MERCADOS[nombre]
+    momento = (momento or ahora()).astimezone(datos_mercado.zona)
+    dia = momento.date()
+    return _es_rueda(datos_mercado, dia) and _apertura(datos_mercado, dia) <= momento < _fin(datos_mercado, dia)
+
+
+# Función para obtener la última rueda cerrada de un mercado
+def ultima_rueda_cerrada(nombre, momento=None):
+    """
+    Retorna la fecha de la última rueda terminada (cierre + DEMORA_CIERRE), cuyos datos ya no cambian
+    """
+    datos_mercado = MERCADOS[nombre]
+    momento = (momento or ahora()).astimezone(datos_mercado.zona)
+    dia = momento.date()
+    if not (_es_rueda(datos_mercado, dia) and momento >= _fin(datos_mercado, dia)):
+        dia -= timedelta(days=1)
+    while not _es_rueda(datos_mercado, dia):
+        dia -= timedelta(days=1)
+    return dia
+
+
+# Función para obtener la próxima apertura de un mercado
+def proxima_apertura(nombre, momento=None):
+    """
+    Retorna la fecha y hora (en la zona del mercado) de la próxima apertura
+    """
+    datos_mercado = MERCADOS[nombre]
+    momento = (momento or ahora()).astimezone(datos_mercado.zona)
+    dia = momento.date()
+    if not (_es_rueda(datos_mercado, dia) and momento < _apertura(datos_mercado, dia)):
+        dia += timedelta(days=1)
+    while not _es_rueda(datos_mercado, dia):
+        dia += timedelta(days=1)
+    return _apertura(datos_mercado, dia)
+
+
+# Función para saber si puede haber ruedas nuevas después de una fecha
+def hay_rueda_nueva(nombre, cerrado_hasta, momento=None):
+    """
+    True si el mercado abrió alguna rueda posterior a cerrado_hasta
+    (si no, volver a descargar después de esa fecha no trae nada nuevo)
+    """
+    datos_mercado = MERCADOS[nombre]
+    dia = cerrado_hasta + timedelta(days=1)
+    while not _es_rueda(datos_mercado, dia):
+        dia += timedelta(days=1)
+    return _apertura(datos_mercado, dia) <= (momento or ahora())
+
+
+# Función para obtener la vigencia de los datos cacheados
+def vigencia(momento=None):
+    """
+    Clave que cambia cuando los datos pueden haber cambiado: cada
+    CADENCIA_EN_RUEDA segundos si algún mercado está en rueda, y en cada
+    cierre si están todos cerrados
+    """
+    momento = momento or ahora()
+    if any(en_rueda(nombre, momento) for nombre in MERCADOS):
+        return f"rueda:{int(momento.timestamp() // CADENCIA_EN_RUEDA)}"
+    return "cerrado:" + ",".join(ultima_rueda_cerrada(nombre, momento).isoformat() for nombre in MERCADOS)
+
+
+# Función para describir el estado de los mercados
+def descripcion(momento=None):
+    """
+    Texto corto con el estado de cada mercado, con las aperturas en hora de Buenos Aires
+    (ej. "BYMA en rueda · NYSE/NASDAQ cerrado hasta el 19/10 10:30")
+    """
+    momento = momento or ahora()
+    zona_local = MERCADOS["byma"].zona
+    partes = []
+    for nombre, datos_mercado in MERCADOS.items():
+        if en_rueda(nombre, momento):
+            partes.append(f"{datos_mercado.nombre} en rueda")
+        else:
+            apertura = proxima_apertura(nombre, momento).astimezone(zona_local)
+            partes.append(f"{datos_mercado.nombre} cerrado hasta el {apertura:%d/%m %H:%M}")
+    return " · ".join(partes)
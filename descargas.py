@@ -0,0 +1,305 @@
+"""
+Coordinación de las descargas a la red
+
+Cada sesión del navegador ejecuta app.py por separado: al abrir el mercado
+muchas sesiones pierden la cache a la vez y pedirían los mismos símbolos al
+mismo tiempo. Las descargas pasan por compartir(), que deja un solo pedido
+en vuelo por (símbolo, tramo, intervalo) en todo el proceso; los demás
+esperan ese pedido y reciben el mismo resultado.
+
+Los pedidos que sí salen pasan por proteger(), que los acompasa con un
+limitador de tokens común a todo el proceso, reintenta los errores
+transitorios con espera exponencial y aleatoria, y deja de pedir por un
+tiempo los símbolos que fallan seguido (circuito abierto). El circuito es
+por símbolo: una consulta que falla entera solo cuenta contra los símbolos
+que el error nombra (atributo simbolos) o contra su único símbolo, así unas
+pocas consultas caídas no pausan toda la lista. Si el error trae los
+símbolos que sí llegaron (atributo datos), esos se conservan y solo se
+reintentan los que fallaron; si al final alguno sigue fallando se lanza
+ErrorParcial con lo que llegó. Los contadores de estadisticas() muestran
+cuánto se está frenando al proveedor.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+
+logger = logging.getLogger("rsi_usd.descargas")
+
+# Limitador de tokens: pedidos por segundo sostenidos y ráfaga máxima
+PEDIDOS_POR_SEGUNDO = 2.0
+RAFAGA_PEDIDOS = 5
+
+# Reintentos ante errores transitorios (espera aleatoria entre 0 y base * 2^intento, con tope)
+REINTENTOS = 3
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 30.0
+
+# Circuito por símbolo: fallas seguidas para abrirlo y segundos que queda abierto
+FALLAS_PARA_ABRIR = 3
+SEGUNDOS_CIRCUITO_ABIERTO = 300
+
+# Partes del nombre de un error que indican una falla transitoria
+PARTES_TRANSITORIAS = ("RateLimit", "Timeout", "Connection")
+
+# Un tramo de más de una semana sin ninguna rueda cuenta como falla del símbolo
+# (los tramos cortos pueden estar vacíos por fines de semana o feriados)
+DIAS_TRAMO_VACIO_ES_FALLA = 7
+
+_lock = threading.Lock()
+_en_vuelo = {}
+
+_lock_limitador = threading.Lock()
+_tokens = float(RAFAGA_PEDIDOS)
+_ultima_recarga = time.monotonic()
+
+_lock_circuitos = threading.Lock()
+_circuitos = {}  # simbolo -> (fallas seguidas, abierto hasta)
+
+_lock_contadores = threading.Lock()
+_contadores = {
+    'pedidos': 0,
+    'pedidos_demorados': 0,
+    'segundos_demorados': 0.0,
+    'reintentos': 0,
+    'errores_transitorios': 0,
+    'errores_definitivos': 0,
+    'circuitos_abiertos': 0,
+    'simbolos_salteados': 0,
+    'descargas_compartidas': 0
+}
+
+
+class ErrorParcial(Exception):
+    """
+    Falla de algunos símbolos de una consulta: datos son los que sí llegaron
+    ({simbolo: DataFrame}), simbolos los que fallaron y causa el error original
+    """
+    def __init__(self, datos, simbolos, causa):
+        super().__init__(str(causa))
+        self.datos = dict(datos)
+        self.simbolos = tuple(simbolos)
+        self.causa = causa
+
+
+def _contar(contador, cantidad=1):
+    with _lock_contadores:
+        _contadores[contador] += cantidad
+
+
+def estadisticas():
+    """
+    Retorna una copia de los contadores de descargas y la cantidad de circuitos abiertos ahora
+    """
+    with _lock_contadores:
+        datos = dict(_contadores)
+    ahora = time.monotonic()
+    with _lock_circuitos:
+        datos['circuitos_abiertos_ahora'] = sum(1 for _, hasta in _circuitos.values() if hasta > ahora)
+    return datos
+
+
+def tomar_turno():
+    """
+    Espera hasta que el limitador de tokens permita un pedido más
+    Retorna los segundos esperados
+    """
+    global _tokens, _ultima_recarga
+
+    esperado = 0.0
+    while True:
+        with _lock_limitador:
+            ahora = time.monotonic()
+            _tokens = min(RAFAGA_PEDIDOS, _tokens + (ahora - _ultima_recarga) * PEDIDOS_POR_SEGUNDO)
+            _ultima_recarga = ahora
+            if _tokens >= 1:
+                _tokens -= 1
+                break
+            espera = (1 - _tokens) / PEDIDOS_POR_SEGUNDO
+        time.sleep(espera)
+        esperado += espera
+
+    if esperado:
+        _contar('pedidos_demorados')
+        _contar('segundos_demorados', esperado)
+    return esperado
+
+
+def es_transitorio(error):
+    """
+    Indica si vale la pena reintentar: fallas de red, timeouts y límites de pedidos del proveedor
+    """
+    if isinstance(error, ErrorParcial):
+        return es_transitorio(error.causa)
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    nombre = type(error).__name__
+    return any(parte in nombre for parte in PARTES_TRANSITORIAS) or es_mensaje_transitorio(str(error))
+
+
+def es_mensaje_transitorio(mensaje):
+    """
+    Lo mismo para un error que llega como texto (ej. "YFRateLimitError('Too Many
+    Requests...')", como los que yfinance registra por símbolo sin lanzarlos)
+    """
+    return (
+        any(parte in mensaje for parte in PARTES_TRANSITORIAS)
+        or "Too Many Requests" in mensaje
+        or "429" in mensaje
+    )
+
+
+def circuito_abierto(simbolo):
+    """
+    Indica si el símbolo está pausado por fallas seguidas
+    """
+    with _lock_circuitos:
+        _, hasta = _circuitos.get(simbolo, (0, 0.0))
+    return hasta > time.monotonic()
+
+
+def _registrar_resultado(simbolo, exito):
+    with _lock_circuitos:
+        fallas, _ = _circuitos.get(simbolo, (0, 0.0))
+        if exito:
+            _circuitos.pop(simbolo, None)
+            return
+        fallas += 1
+        # Al abrirse, el circuito deja pasar un pedido de prueba cuando vence
+        hasta = time.monotonic() + SEGUNDOS_CIRCUITO_ABIERTO if fallas >= FALLAS_PARA_ABRIR else 0.0
+        _circuitos[simbolo] = (fallas, hasta)
+
+    if fallas >= FALLAS_PARA_ABRIR:
+        _contar('circuitos_abiertos')
+        logger.warning("circuito abierto simbolo=%s fallas=%d segundos=%d", simbolo, fallas, SEGUNDOS_CIRCUITO_ABIERTO)
+
+
+def proteger(descargar, simbolos, start_date, end_date):
+    """
+    Llama a descargar(simbolos, start_date, end_date) respetando el limitador,
+    reintentando los errores transitorios y salteando los símbolos con el
+    circuito abierto (no aparecen en el resultado)
+    Si el error nombra símbolos (atributo simbolos) solo esos se reintentan y
+    la falla cuenta solo contra ellos; si no, solo cuando la consulta era de
+    un único símbolo. Si al final fallan algunos y otros llegaron (atributo
+    datos del error), lanza ErrorParcial con los que llegaron
+    Retorna {simbolo: DataFrame} como descargar
+    """
+    activos = tuple(s for s in simbolos if not circuito_abierto(s))
+    if len(activos) < len(simbolos):
+        _contar('simbolos_salteados', len(simbolos) - len(activos))
+    if not activos:
+        return {}
+
+    datos = {}
+    pendientes = activos
+    for intento in range(REINTENTOS + 1):
+        tomar_turno()
+        _contar('pedidos')
+        try:
+            datos.update(descargar(pendientes, start_date, end_date))
+            break
+        except Exception as e:
+            # Lo que sí llegó se conserva; se sigue solo con los símbolos que fallaron
+            datos.update(getattr(e, 'datos', None) or {})
+            fallidos = getattr(e, 'simbolos', None)
+            if fallidos:
+                pendientes = tuple(s for s in pendientes if s in fallidos)
+            elif len(pendientes) == 1:
+                fallidos = pendientes
+            else:
+                fallidos = ()
+
+            if not es_transitorio(e) or intento == REINTENTOS:
+                _contar('errores_definitivos')
+                for simbolo in fallidos:
+                    if simbolo in pendientes:
+                        _registrar_resultado(simbolo, False)
+                if datos:
+                    for simbolo in datos:
+                        _registrar_resultado(simbolo, True)
+                    raise ErrorParcial(datos, pendientes, e) from e
+                raise
+
+            _contar('errores_transitorios')
+            _contar('reintentos')
+            espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento))
+            logger.warning(
+                "error transitorio simbolos=%s intento=%d espera=%.2f error=%s",
+                ",".join(pendientes), intento + 1, espera, e
+            )
+            time.sleep(espera)
+
+    tramo_largo = end_date - start_date > timedelta(days=DIAS_TRAMO_VACIO_ES_FALLA)
+    for simbolo in activos:
+        if simbolo in datos:
+            _registrar_resultado(simbolo, True)
+        elif tramo_largo:
+            _registrar_resultado(simbolo, False)
+
+    return datos
+
+
+def compartir(descargar, simbolos, start_date, end_date, intervalo="1d"):
+    """
+    Llama a descargar(simbolos, start_date, end_date) solo para los símbolos
+    que no tienen ya una descarga en vuelo del mismo tramo e intervalo, y
+    espera a las que sí. Retorna {simbolo: DataFrame} como descargar
+    Si una descarga falla, todos los que la esperaban reciben la excepción;
+    con una ErrorParcial solo la reciben los símbolos que fallaron, y si
+    alguno llegó se lanza una ErrorParcial con lo que llegó
+    """
+    futuros = {}
+    propios = []
+    with _lock:
+        for simbolo in dict.fromkeys(simbolos):
+            clave = (simbolo, start_date, end_date, intervalo)
+            futuro = _en_vuelo.get(clave)
+            if futuro is None:
+                futuro = Future()
+                _en_vuelo[clave] = futuro
+                propios.append(simbolo)
+            futuros[simbolo] = futuro
+    if len(propios) < len(futuros):
+        _contar('descargas_compartidas', len(futuros) - len(propios))
+
+    # Los símbolos nuevos se descargan juntos en una sola consulta
+    if propios:
+        try:
+            datos = descargar(tuple(propios), start_date, end_date)
+        except ErrorParcial as e:
+            for simbolo in propios:
+                if simbolo in e.simbolos:
+                    futuros[simbolo].set_exception(e.causa)
+                else:
+                    futuros[simbolo].set_result(e.datos.get(simbolo))
+        except BaseException as e:
+            for simbolo in propios:
+                futuros[simbolo].set_exception(e)
+        else:
+            for simbolo in propios:
+                futuros[simbolo].set_result(datos.get(simbolo))
+        finally:
+            with _lock:
+                for simbolo in propios:
+                    _en_vuelo.pop((simbolo, start_date, end_date, intervalo), None)
+
+    resultado = {}
+    fallidos = {}
+    for simbolo, futuro in futuros.items():
+        try:
+            df = futuro.result()
+        except Exception as e:
+            fallidos[simbolo] = e
+            continue
+        if df is not None:
+            resultado[simbolo] = df
+
+    if fallidos:
+        error = next(iter(fallidos.values()))
+        if resultado:
+            raise ErrorParcial(resultado, fallidos, error) from error
+        raise error
+    return resultado
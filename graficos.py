@@ -0,0 +1,202 @@
+"""
+Reducción de puntos para gráficos de series largas
+
+Con historias de varios años (o intradiarias) mandar cada punto al
+navegador hace lento el gráfico. Estas funciones eligen un subconjunto
+que conserva la forma de cada serie (LTTB) y los cruces de los niveles
+del RSI, para graficar con trazos WebGL.
+
+figura_detalle arma el gráfico de detalle de una acción (Plotly se importa
+recién ahí, cuando hay un gráfico para mostrar).
+"""
+import numpy as np
+import pandas as pd
+
+# Ancho en píxeles del gráfico reducido y puntos por píxel: más de un punto
+# por píxel no se distingue en pantalla, así que el máximo sale del ancho
+ANCHO_GRAFICO_PX = 1100
+PUNTOS_POR_PIXEL = 1
+
+
+# Función para calcular el máximo de puntos para un ancho
+def presupuesto_puntos(ancho_px=ANCHO_GRAFICO_PX):
+    return int(ancho_px * PUNTOS_POR_PIXEL)
+
+
+# Máximo de puntos por gráfico; con más se usan trazos WebGL y se reduce la
+# serie conservando su forma. Con la ventana de la app (hasta 365 días, unas
+# 260 ruedas) no se alcanza: aplica a historias más largas (CLI, benchmarks)
+MAX_PUNTOS_GRAFICO = presupuesto_puntos()
+
+
+# Función para elegir puntos con Largest-Triangle-Three-Buckets
+def indices_lttb(y, cantidad):
+    """
+    Elige `cantidad` puntos que conservan la forma de la serie (LTTB):
+    divide la serie en tramos y de cada uno toma el punto que forma el
+    triángulo más grande con el punto anterior elegido y el promedio del
+    tramo siguiente. Siempre incluye el primero y el último.
+    Retorna los índices elegidos
+    """
+    y = pd.Series(np.asarray(y, dtype=float)).ffill().bfill().to_numpy()
+    n = len(y)
+
+    if cantidad >= n or cantidad < 3:
+        return np.arange(n)
+    if np.isnan(y).all():
+        return np.unique(np.linspace(0, n - 1, cantidad).astype(int))
+
+    x = np.arange(n, dtype=float)
+    bordes = np.linspace(1, n - 1, cantidad - 1).astype(int)
+
+    elegidos = np.empty(cantidad, dtype=int)
+    elegidos[0] = 0
+    elegidos[-1] = n - 1
+
+    anterior = 0
+    for i in range(cantidad - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+
+        promedio_x = x[fin:siguiente_fin].mean()
+        promedio_y = y[fin:siguiente_fin].mean()
+
+        areas = np.abs(
+            (x[anterior] - promedio_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (promedio_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+
+    return elegidos
+
+
+# Función para encontrar los cruces de niveles
+def indices_cruces(y, niveles):
+    """
+    Retorna los índices a ambos lados de cada cruce de los niveles (ej. 30 y 70 del RSI)
+    """
+    y = np.asarray(y, dtype=float)
+    indices = []
+
+    for nivel in niveles:
+        lado = np.sign(y - nivel)
+        cambios = np.flatnonzero((lado[1:] != lado[:-1]) & ~np.isnan(lado[1:]) & ~np.isnan(lado[:-1]))
+        indices.extend([cambios, cambios + 1])
+
+    if not indices:
+        return np.array([], dtype=int)
+    return np.concatenate(indices)
+
+
+# Función para reducir un DataFrame antes de graficarlo
+def reducir_para_grafico(df, columnas, max_puntos, columnas_con_niveles=(), niveles=(30, 70)):
+    """
+    Reduce el DataFrame a unos max_puntos filas compartidas por todas las columnas
+    Cada columna aporta sus puntos LTTB, su máximo y su mínimo; las de
+    columnas_con_niveles además conservan los dos puntos de cada cruce de los niveles
+    """
+    if len(df) <= max_puntos:
+        return df
+
+    por_columna = max(max_puntos // max(len(columnas), 1), 3)
+    indices = [indices_lttb(df[columna].to_numpy(), por_columna) for columna in columnas]
+    # Máximo y mínimo de cada columna, para que la escala del eje no cambie
+    indices += [
+        np.array([np.nanargmax(valores), np.nanargmin(valores)])
+        for valores in (df[columna].to_numpy(dtype=float) for columna in columnas)
+        if not np.isnan(valores).all()
+    ]
+    indices += [indices_cruces(df[columna].to_numpy(), niveles) for columna in columnas_con_niveles]
+
+    return df.iloc[np.unique(np.concatenate(indices))]
+
+
+# Función para armar el gráfico de detalle de una acción
+def figura_detalle(df, ticker, webgl=False, ancho=None):
+    """
+    Arma la figura de tres filas (precio en USD, RSI en USD y ARS, TC) de una acción
+    Con webgl=True usa trazos Scattergl, para series largas; con ancho (en
+    píxeles) fija el ancho de la figura, el mismo con que se calculó el máximo de puntos
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    Trazo = go.Scattergl if webgl else go.Scatter
+
+    # Crear subplots
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(
+            f'{ticker} - Precio en USD',
+            'RSI en USD vs RSI en ARS',
+            'Tipo de Cambio Implícito'
+        ),
+        row_heights=[0.4, 0.35, 0.25]
+    )
+
+    # Subplot 1: Precio en USD
+    fig.add_trace(
+        Trazo(
+            x=df.index,
+            y=df['Close_USD'],
+            name='Precio USD',
+            line=dict(color='blue', width=2)
+        ),
+        row=1, col=1
+    )
+
+    # Subplot 2: RSI USD y ARS
+    fig.add_trace(
+        Trazo(
+            x=df.index,
+            y=df['RSI_USD'],
+            name='RSI (USD)',
+            line=dict(color='green', width=2)
+        ),
+        row=2, col=1
+    )
+
+    fig.add_trace(
+        Trazo(
+            x=df.index,
+            y=df['RSI_ARS'],
+            name='RSI (ARS)',
+            line=dict(color='orange', width=2, dash='dash')
+        ),
+        row=2, col=1
+    )
+
+    # Líneas de referencia RSI
+    fig.add_hline(y=70, line_dash="dot", line_color="red", opacity=0.5, row=2, col=1)
+    fig.add_hline(y=30, line_dash="dot", line_color="green", opacity=0.5, row=2, col=1)
+
+    # Subplot 3: Tipo de Cambio
+    fig.add_trace(
+        Trazo(
+            x=df.index,
+            y=df['TC'],
+            name='TC GGAL',
+            line=dict(color='purple', width=2),
+            fill='tozeroy'
+        ),
+        row=3, col=1
+    )
+
+    # Layout
+    fig.update_xaxes(title_text="Fecha", row=3, col=1)
+    fig.update_yaxes(title_text="USD", row=1, col=1)
+    fig.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
+    fig.update_yaxes(title_text="ARS/USD", row=3, col=1)
+
+    fig.update_layout(
+        height=800,
+        hovermode='x unified',
+        showlegend=True
+    )
+    if ancho:
+        fig.update_layout(width=ancho)
+
+    return fig
@@ -0,0 +1,176 @@
+"""
+Indicadores técnicos: RSI (Relative Strength Index)
+"""
+import numpy as np
+import pandas as pd
+
+
+# Función para calcular RSI
+def calcular_rsi(precios, periodo=14):
+    """
+    Calcula el RSI (Relative Strength Index)
+    """
+    deltas = precios.diff()
+    ganancias = deltas.where(deltas > 0, 0)
+    perdidas = -deltas.where(deltas < 0, 0)
+
+    avg_ganancias = ganancias.rolling(window=periodo).mean()
+    avg_perdidas = perdidas.rolling(window=periodo).mean()
+
+    rs = avg_ganancias / avg_perdidas
+    rsi = 100 - (100 / (1 + rs))
+
+    return rsi
+
+
+# Función para calcular el RSI de un bloque de series y varios períodos a la vez
+def rsi_matriz(bloque, periodos):
+    """
+    Calcula el RSI de todas las columnas de un bloque alineado por fecha
+    (fechas × tickers × monedas, o cualquier forma cuya primera dimensión
+    sean las fechas) para todos los períodos, en una sola llamada.
+    Con las sumas acumuladas S de ganancias y pérdidas, la media móvil de
+    período p en t es (S[t] - S[t - p]) / p, así que cada período es una
+    resta de arreglos en lugar de un rolling por columna.
+    Los NaN se tratan por columna: antes del primer precio no hay RSI, un
+    hueco no cuenta como rueda (la ventana de p variaciones abarca las
+    últimas p ruedas con precio de esa columna, como calcular_rsi sobre la
+    serie sola) y el RSI de ese día es NaN.
+    Retorna un arreglo con forma bloque.shape + (len(periodos),)
+    """
+    bloque = np.asarray(bloque, dtype=float)
+    periodos = np.asarray(list(periodos))
+    n = bloque.shape[0]
+    precios = bloque.reshape(n, int(np.prod(bloque.shape[1:])))
+    m = precios.shape[1]
+
+    salida = np.full((n, m, len(periodos)), np.nan)
+    if n == 0 or m == 0:
+        return salida.reshape(bloque.shape + (len(periodos),))
+
+    # Forward fill por columna (índice del último precio válido)
+    faltantes = np.isnan(precios)
+    ultimo_valido = np.where(faltantes, 0, np.arange(n)[:, None])
+    np.maximum.accumulate(ultimo_valido, axis=0, out=ultimo_valido)
+    precios = precios[ultimo_valido, np.arange(m)]
+
+    # Mismo criterio que calcular_rsi: el primer delta (NaN) cuenta como 0
+    deltas = np.zeros((n, m))
+    np.subtract(precios[1:], precios[:-1], out=deltas[1:])
+    deltas[np.isnan(deltas)] = 0.0
+
+    # Sumas acumuladas con una fila de ceros adelante: suma de (t - p, t] = S[t + 1] - S[t + 1 - p]
+    acum_ganancias = np.zeros((n + 1, m))
+    acum_perdidas = np.zeros((n + 1, m))
+    np.cumsum(np.maximum(deltas, 0.0), axis=0, out=acum_ganancias[1:])
+    np.cumsum(np.maximum(-deltas, 0.0), axis=0, out=acum_perdidas[1:])
+
+    # Las restas de sumas acumuladas dejan residuos de redondeo donde la suma real es 0
+    tolerancia = 1e-12 * (acum_ganancias[-1] + acum_perdidas[-1])
+
+    # Ruedas con precio de cada columna: cantidad acumulada y fila de la j-ésima.
+    # Los huecos tienen variación 0, así que la ventana de una rueda va desde
+    # la fila de su p-ésima rueda con precio hacia atrás
+    validas = ~faltantes
+    ruedas = np.cumsum(validas, axis=0)
+    filas_validas, columnas_validas = np.nonzero(validas)
+    fila_de_rueda = np.zeros((n, m), dtype=int)
+    fila_de_rueda[ruedas[filas_validas, columnas_validas] - 1, columnas_validas] = filas_validas
+    columnas = np.arange(m)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, periodo in enumerate(periodos):
+            primera = np.maximum(ruedas - periodo, 0)
+            filas = fila_de_rueda[primera, columnas]
+
+            suma_ganancias = acum_ganancias[1:] - acum_ganancias[filas, columnas]
+            suma_perdidas = acum_perdidas[1:] - acum_perdidas[filas, columnas]
+            suma_ganancias[suma_ganancias < tolerancia] = 0.0
+            suma_perdidas[suma_perdidas < tolerancia] = 0.0
+
+            # La división por p se cancela en el cociente
+            rsi = 100 - (100 / (1 + suma_ganancias / suma_perdidas))
+
+            salida[:, :, k] = np.where(validas & (ruedas >= periodo), rsi, np.nan)
+
+    return salida.reshape(bloque.shape + (len(periodos),))
+
+
+# Función para calcular el RSI de varios períodos a la vez
+def rsi_multiperiodo(precios, periodos):
+    """
+    Calcula el RSI de una serie para todos los períodos (ver rsi_matriz)
+    Retorna un DataFrame con una columna por período, igual a calcular_rsi
+    """
+    periodos = list(periodos)
+    valores = np.asarray(precios, dtype=float)
+    rsi = rsi_matriz(valores[:, None], periodos)[:, 0, :]
+
+    return pd.DataFrame(rsi, index=getattr(precios, 'index', None), columns=periodos)
+
+
+# Función para crear el estado inicial del RSI de Wilder
+def estado_wilder_inicial(columnas, periodos):
+    """
+    Estado del RSI de Wilder para varias columnas y períodos:
+    último cierre, cantidad de variaciones procesadas y medias de
+    ganancias y pérdidas (columnas × períodos)
+    """
+    return {
+        'cierre': np.full(columnas, np.nan),
+        'variaciones': np.zeros(columnas, dtype=int),
+        'ganancia': np.zeros((columnas, len(periodos))),
+        'perdida': np.zeros((columnas, len(periodos)))
+    }
+
+
+# Función para avanzar el RSI de Wilder una rueda
+def actualizar_wilder(estado, precios, periodos):
+    """
+    Avanza el estado una rueda en tiempo constante y retorna el RSI
+    (columnas × períodos). Las primeras p variaciones se promedian en forma
+    simple (semilla de Wilder) y después media += (variación - media) / p.
+    Las columnas con precio NaN no cambian y su RSI es NaN
+    """
+    periodos = np.asarray(list(periodos))
+    precios = np.asarray(precios, dtype=float)
+
+    validos = ~np.isnan(precios)
+    con_previo = validos & ~np.isnan(estado['cierre'])
+    deltas = np.where(con_previo, precios - np.where(con_previo, estado['cierre'], 0.0), 0.0)
+
+    estado['variaciones'] += con_previo
+    divisor = np.maximum(np.minimum(estado['variaciones'][:, None], periodos[None, :]), 1)
+    actualizar = con_previo[:, None]
+
+    estado['ganancia'] += np.where(actualizar, (np.maximum(deltas, 0.0)[:, None] - estado['ganancia']) / divisor, 0.0)
+    estado['perdida'] += np.where(actualizar, (np.maximum(-deltas, 0.0)[:, None] - estado['perdida']) / divisor, 0.0)
+    estado['cierre'] = np.where(validos, precios, estado['cierre'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + estado['ganancia'] / estado['perdida']))
+
+    listos = validos[:, None] & (estado['variaciones'][:, None] >= periodos[None, :])
+    return np.where(listos, rsi, np.nan)
+
+
+# Función para calcular el RSI de Wilder de un bloque
+def rsi_wilder(bloque, periodos, estado=None):
+    """
+    Calcula el RSI de Wilder de un bloque (fechas × columnas) para todos los
+    períodos, rueda a rueda. Si se pasa un estado, continúa desde él (solo
+    se procesan las ruedas nuevas); el estado se modifica en el lugar.
+    Retorna (rsi con forma fechas × columnas × períodos, estado)
+    """
+    periodos = list(periodos)
+    bloque = np.asarray(bloque, dtype=float)
+    n, m = bloque.shape
+
+    if estado is None:
+        estado = estado_wilder_inicial(m, periodos)
+
+    salida = np.empty((n, m, len(periodos)))
+    for fila in range(n):
+        salida[fila] = actualizar_wilder(estado, bloque[fila], periodos)
+
+    return salida, estado
@@ -0,0 +1,282 @@
+"""
+Métricas del proceso en el formato de texto de Prometheus
+
+Cada réplica de la aplicación acumula sus propios contadores e histogramas:
+
+- símbolos pedidos al proveedor, por mercado (BYMA o EE.UU.) y resultado,
+  y la latencia de cada consulta
+- aciertos y fallos de cada función cacheada
+- par usado para el tipo de cambio y pares descartados
+- duración de cada etapa medida con tiempos.medir (entre ellas el RSI)
+- los contadores de descargas.estadisticas() (reintentos, circuitos...)
+
+Con la variable de entorno RSI_METRICAS_PUERTO la aplicación sirve
+exponer() en http://RSI_METRICAS_HOST:PUERTO/metrics (host default:
+127.0.0.1), para que Prometheus la lea:
+
+    RSI_METRICAS_PUERTO=9464 streamlit run app.py
+    curl localhost:9464/metrics
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import calendario
+import descargas
+import tiempos
+
+logger = logging.getLogger("rsi_usd.metricas")
+
+# Límites de los histogramas de duración, en segundos
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metricas = []
+
+
+class Metrica:
+    """
+    Una métrica con nombre, ayuda y etiquetas; guarda un valor por cada
+    combinación de valores de las etiquetas
+    """
+    tipo = "untyped"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def _clave(self, etiquetas):
+        return tuple(str(etiquetas[e]) for e in self.etiquetas)
+
+    def _selector(self, clave, extra=()):
+        pares = list(zip(self.etiquetas, clave)) + list(extra)
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{e}="{escapar(v)}"' for e, v in pares) + "}"
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}{self._selector(clave)} {formatear(valor)}" for clave, valor in valores]
+
+
+class Contador(Metrica):
+    """
+    Valor que solo crece (pedidos, aciertos de cache...)
+    """
+    tipo = "counter"
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+
+class Medidor(Metrica):
+    """
+    Valor que sube y baja (ej. el par de TC vigente)
+    """
+    tipo = "gauge"
+
+    def fijar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+
+class Histograma(Metrica):
+    """
+    Distribución de duraciones: cuenta las observaciones por debajo de cada límite
+    """
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(limites)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            cuentas, suma, total = self._valores.get(clave, ([0] * len(self.limites), 0.0, 0))
+            cuentas = [c + (valor <= limite) for c, limite in zip(cuentas, self.limites)]
+            self._valores[clave] = (cuentas, suma + valor, total + 1)
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        lineas = []
+        for clave, (cuentas, suma, total) in valores:
+            for limite, cuenta in zip(self.limites, cuentas):
+                lineas.append(f"{self.nombre}_bucket{self._selector(clave, [('le', formatear(limite))])} {cuenta}")
+            lineas.append(f"{self.nombre}_bucket{self._selector(clave, [('le', '+Inf')])} {total}")
+            lineas.append(f"{self.nombre}_sum{self._selector(clave)} {formatear(suma)}")
+            lineas.append(f"{self.nombre}_count{self._selector(clave)} {total}")
+        return lineas
+
+
+SIMBOLOS_DESCARGADOS = Contador(
+    "rsi_usd_simbolos_descargados_total",
+    "Símbolos pedidos al proveedor, por mercado y resultado (ok, vacio, error)",
+    ("proveedor", "mercado", "resultado")
+)
+LATENCIA_DESCARGA = Histograma(
+    "rsi_usd_descarga_segundos",
+    "Duración de cada consulta al proveedor, con reintentos",
+    ("proveedor", "resultado")
+)
+CACHE = Contador(
+    "rsi_usd_cache_total",
+    "Llamadas a las funciones cacheadas, por resultado (acierto, fallo)",
+    ("funcion", "resultado")
+)
+TC_PAR = Contador(
+    "rsi_usd_tc_par_total",
+    "Series de TC armadas, por par usado",
+    ("par",)
+)
+TC_PAR_VIGENTE = Medidor(
+    "rsi_usd_tc_par_vigente",
+    "1 para el par de la última serie de TC armada, 0 para los demás",
+    ("par",)
+)
+TC_DESCARTES = Contador(
+    "rsi_usd_tc_descartes_total",
+    "Pares de TC descartados por falta de datos o error",
+    ("par",)
+)
+ETAPAS = Histograma(
+    "rsi_usd_etapa_segundos",
+    "Duración de cada etapa medida (ver tiempos.py); el RSI es etapa=\"rsi\"",
+    ("etapa",)
+)
+
+
+# Función para escapar el valor de una etiqueta
+def escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Función para formatear un número
+def formatear(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+# Función para contar una consulta al proveedor
+def contar_descarga(proveedor, simbolos, datos, segundos):
+    """
+    Registra una consulta: datos es el resultado, o None si la consulta falló
+    """
+    for simbolo in simbolos:
+        if datos is None:
+            resultado = "error"
+        else:
+            resultado = "ok" if simbolo in datos else "vacio"
+        SIMBOLOS_DESCARGADOS.incrementar(proveedor=proveedor, mercado=calendario.mercado(simbolo), resultado=resultado)
+    LATENCIA_DESCARGA.observar(segundos, proveedor=proveedor, resultado="error" if datos is None else "ok")
+
+
+# Función para registrar el par de TC usado
+def registrar_par_tc(par, descartados, pares):
+    """
+    Registra el par usado en la serie de TC (None si no hubo ninguno) y los
+    descartados; pares son todos los pares posibles, para el medidor
+    """
+    for descartado in descartados:
+        TC_DESCARTES.incrementar(par=descartado)
+    if par is not None:
+        TC_PAR.incrementar(par=par)
+    for posible in pares:
+        TC_PAR_VIGENTE.fijar(1 if posible == par else 0, par=posible)
+
+
+# Observador de tiempos.medir: duración de cada etapa y resultado de cada cache
+def observar_medicion(datos):
+    ETAPAS.observar(datos['ms'] / 1000, etapa=datos['etapa'])
+    if datos['etapa'].startswith("cache.") and 'cache' in datos:
+        CACHE.incrementar(funcion=datos['etapa'][len("cache."):], resultado=datos['cache'])
+
+
+tiempos.al_medir(observar_medicion)
+
+
+# Función para generar el texto de exposición
+def exponer():
+    """
+    Retorna todas las métricas en el formato de texto de Prometheus
+    """
+    lineas = []
+    for metrica in _metricas:
+        lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+        lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+        lineas.extend(metrica.lineas())
+
+    # Contadores propios de descargas.py (limitador, reintentos, circuitos)
+    estadisticas = descargas.estadisticas()
+    abiertos = estadisticas.pop('circuitos_abiertos_ahora')
+    lineas.append("# HELP rsi_usd_descargas_eventos_total Eventos del limitador, los reintentos y los circuitos (ver descargas.py)")
+    lineas.append("# TYPE rsi_usd_descargas_eventos_total counter")
+    for evento, valor in sorted(estadisticas.items()):
+        lineas.append(f'rsi_usd_descargas_eventos_total{{evento="{evento}"}} {formatear(valor)}')
+    lineas.append("# HELP rsi_usd_circuitos_abiertos Símbolos con el circuito abierto ahora")
+    lineas.append("# TYPE rsi_usd_circuitos_abiertos gauge")
+    lineas.append(f"rsi_usd_circuitos_abiertos {abiertos}")
+
+    return "\n".join(lineas) + "\n"
+
+
+class _ManejadorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        cuerpo = exponer().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        logger.debug(formato, *args)
+
+
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+# Función para servir las métricas por HTTP
+def servir(puerto, host="127.0.0.1"):
+    """
+    Sirve exponer() en http://host:puerto/metrics desde un hilo de fondo
+    Se inicia una sola vez por proceso; retorna el servidor (o None si el puerto está ocupado)
+    """
+    global _servidor
+
+    with _lock_servidor:
+        if _servidor is None:
+            try:
+                _servidor = ThreadingHTTPServer((host, puerto), _ManejadorMetricas)
+            except OSError as e:
+                logger.warning("no se pudo servir métricas en %s:%d: %s", host, puerto, e)
+                return None
+            _servidor.daemon_threads = True
+            threading.Thread(target=_servidor.serve_forever, name="metricas", daemon=True).start()
+            logger.info("métricas en http://%s:%d/metrics", host, _servidor.server_address[1])
+        return _servidor
+
+
+# Función para servir las métricas si está configurado el puerto
+def servir_desde_entorno():
+    """
+    Llama a servir() con RSI_METRICAS_PUERTO y RSI_METRICAS_HOST, si el puerto está definido
+    """
+    puerto = os.environ.get("RSI_METRICAS_PUERTO")
+    if not puerto:
+        return None
+    return servir(int(puerto), os.environ.get("RSI_METRICAS_HOST", "127.0.0.1"))
@@ -0,0 +1,633 @@
+"""
+Núcleo del cálculo del RSI en USD, sin Streamlit
+
+Obtiene el tipo de cambio implícito, las cotizaciones de las acciones (del
+almacén local, descargando solo lo que falta), convierte a USD, calcula el
+RSI y arma la tabla de resultados. Lo usan app.py y la línea de comandos:
+
+    python nucleo.py GGAL YPF BBAR --salida resultados.csv
+    python nucleo.py GGAL --periodo-rsi 21 --metodo wilder --salida rsi.json
+    python nucleo.py GGAL YPF --solo-cache --salida rsi.parquet
+    python nucleo.py GGAL YPF --proveedor local:fixtures,latencia=0.2
+
+Con --solo-cache no se consulta la red: se usa lo que ya está en el almacén.
+Con --proveedor local:CARPETA las cotizaciones salen de fixtures grabados
+(ver proveedores.py).
+"""
+import argparse
+import contextvars
+import hashlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import almacen
+import descargas
+import indicadores
+import metricas
+import proveedores
+import tiempos
+
+# Pares para el tipo de cambio implícito (BYMA, NASDAQ, multiplicador), en orden de prioridad
+PARES_TC = [
+    ("GGAL.BA", "GGAL", 10),  # GGAL con multiplicador 10
+    ("BMA.BA", "BMA", 1),      # Banco Macro sin multiplicador
+    ("YPF.BA", "YPF", 1)       # YPF sin multiplicador
+]
+
+# Límites de los sliders de la barra lateral
+DIAS_MAXIMOS = 365
+PERIODO_RSI_MINIMO = 7
+PERIODO_RSI_MAXIMO = 30
+
+# Todos los períodos del slider "Período RSI" (se calculan juntos)
+PERIODOS_RSI = range(PERIODO_RSI_MINIMO, PERIODO_RSI_MAXIMO + 1)
+
+# Días corridos previos a la ventana para que el RSI ya esté calculado en su
+# primer día (ruedas de calentamiento pasadas a días corridos, con feriados)
+DIAS_CALENTAMIENTO = PERIODO_RSI_MAXIMO * 7 // 5 + 15
+
+# Se descarga siempre la ventana máxima; las ventanas más cortas se recortan en memoria
+DIAS_DESCARGA = DIAS_MAXIMOS + DIAS_CALENTAMIENTO
+
+# Días de historia de la serie de TC (ventana descargada más margen)
+DIAS_SERIE_TC = DIAS_DESCARGA + 30
+
+# Días corridos que consulta el respaldo del TC actual (cubre fines de semana y feriados)
+DIAS_TC_RECIENTE = 7
+
+# Formatos de salida de la línea de comandos (por extensión del archivo)
+FORMATOS_SALIDA = (".csv", ".parquet", ".json")
+
+# Decimales de los números en JSON (los mismos que muestra la app); sin
+# redondear, un float32 sale con todos los dígitos de su valor en float64
+DECIMALES_JSON = 2
+
+# Referencia liviana a una serie de TC
+@dataclass(frozen=True)
+class SerieTC:
+    """
+    Serie de TC junto con una clave barata de hashear (par, último día
+    y digest del contenido), calculada una sola vez por serie.
+    Las funciones cacheadas por ticker usan la clave en lugar de hashear
+    el DataFrame completo en cada llamada
+    """
+    par: tuple
+    ultima_fecha: str
+    digest: str
+    df: pd.DataFrame = field(compare=False, repr=False)
+
+    @property
+    def clave(self):
+        return (self.par, self.ultima_fecha, self.digest)
+
+# Función para calcular el digest del contenido de una serie de TC
+def digest_tc(df_tc):
+    """
+    Digest del TC (índice y valores), se calcula una vez por serie descargada
+    """
+    valores = pd.util.hash_pandas_object(df_tc['TC'], index=True).values
+    return hashlib.blake2b(valores.tobytes(), digest_size=16).hexdigest()
+
+# Función para descargar cotizaciones compartiendo las descargas en curso
+def descargar_cotizaciones(simbolos, start_date, end_date):
+    """
+    Consulta el proveedor en uso (ver proveedores.actual), pero si otra
+    sesión ya está descargando el mismo símbolo y tramo se espera esa
+    descarga en lugar de repetirla. Los pedidos nuevos pasan por
+    descargas.proteger (límite de ritmo, reintentos y circuito por símbolo)
+    """
+    return descargas.compartir(consultar_protegido, simbolos, start_date, end_date)
+
+# Función para consultar el proveedor con límite de ritmo y reintentos
+def consultar_protegido(simbolos, start_date, end_date):
+    """
+    Consulta el proveedor en uso a través de descargas.proteger
+    """
+    proveedor = proveedores.actual()
+    datos = None
+    try:
+        with tiempos.medir("descarga", proveedor=proveedor.nombre, simbolos=len(simbolos)) as medicion:
+            datos = descargas.proteger(proveedor.consultar, simbolos, start_date, end_date)
+            return datos
+    finally:
+        metricas.contar_descarga(proveedor.nombre, simbolos, datos, medicion['ms'] / 1000)
+
+# Función para explicar por qué un símbolo no tiene datos
+def motivo_sin_datos(simbolo):
+    """
+    Retorna el motivo a mostrar para un símbolo sin datos
+    """
+    if descargas.circuito_abierto(simbolo):
+        return "sin datos (descargas pausadas por fallas repetidas)"
+    hasta = almacen.sin_datos([simbolo]).get(simbolo)
+    if hasta is not None:
+        return f"sin datos (símbolo sin cotizaciones, se vuelve a consultar a las {hasta:%H:%M})"
+    return "sin datos"
+
+# Función de descarga que no consulta la red
+def sin_descarga(simbolos, start_date, end_date):
+    """
+    Reemplazo de descargar_cotizaciones para trabajar solo con el almacén local
+    """
+    return {}
+
+# Función para saber si una función de descarga consulta al proveedor
+def consulta_proveedor(descargar):
+    """
+    False para sin_descarga: que no traiga nada no dice que el símbolo no
+    tenga cotizaciones, así que no se marca como sin datos
+    """
+    return descargar is not sin_descarga
+
+# Función para obtener la historia de varias acciones
+def descargar_acciones(simbolos, descargar=descargar_cotizaciones):
+    """
+    Obtiene todos los símbolos desde el almacén local, descargando
+    en una sola consulta solo las ruedas que faltan
+    Siempre cubre la ventana máxima (DIAS_DESCARGA)
+    """
+    start_date = datetime.now() - timedelta(days=DIAS_DESCARGA)
+    return almacen.historial(simbolos, start_date, descargar, marcar=consulta_proveedor(descargar))
+
+# Función para calcular el TC a partir de los cierres de un par
+def calcular_tc(close_ba, close_us, multiplicador):
+    """
+    Calcula el TC implícito como BA / US * multiplicador
+    Retorna None si hay muy pocos días en común
+    """
+    # Crear DataFrame con ambos precios usando el mismo índice
+    df_tc = pd.DataFrame({
+        'BA': close_ba,
+        'US': close_us
+    }, index=close_ba.index)
+
+    # Eliminar NaN
+    df_tc = df_tc.dropna()
+
+    if len(df_tc) < 10:
+        return None
+
+    # Calcular TC
+    df_tc['TC'] = (df_tc['BA'] / df_tc['US']) * multiplicador
+
+    return df_tc
+
+# Función para obtener el TC de un par
+def obtener_tc_par(ticker_ba, ticker_us, multiplicador, start_date, descargar=descargar_cotizaciones):
+    """
+    Obtiene las dos patas del par en una sola consulta y calcula el TC
+    Retorna (df_tc, None) o (None, motivo) si el par no sirve
+    """
+    with tiempos.medir("tc.par", par=ticker_ba):
+        datos = almacen.historial([ticker_ba, ticker_us], start_date, descargar, marcar=consulta_proveedor(descargar))
+
+        if ticker_ba not in datos or ticker_us not in datos:
+            tiempos.anotar(resultado="sin datos")
+            return None, f"No hay datos para {ticker_ba} o {ticker_us}"
+
+        df_tc = calcular_tc(datos[ticker_ba]['Close'], datos[ticker_us]['Close'], multiplicador)
+
+        if df_tc is None:
+            tiempos.anotar(resultado="pocos datos")
+            return None, f"Muy pocos datos para {ticker_ba}"
+
+        tiempos.anotar(resultado="ok")
+        return df_tc, None
+
+# Función para obtener la serie de TC
+def obtener_serie_tc(descargar=descargar_cotizaciones):
+    """
+    Calcula la serie de TC con el ratio GGAL
+    GGAL.BA / GGAL (NASDAQ) * 10
+    Los pares de respaldo (BMA, YPF) se consultan en paralelo y se usa
+    el de mayor prioridad que tenga datos válidos
+    Retorna (df_tc, par usado, digest, motivos de los pares descartados)
+    """
+    start_date = datetime.now() - timedelta(days=DIAS_SERIE_TC)
+    motivos = []
+    descartados = []
+
+    pool = ThreadPoolExecutor(max_workers=len(PARES_TC))
+    futuros = [
+        pool.submit(contextvars.copy_context().run, obtener_tc_par, ticker_ba, ticker_us, multiplicador, start_date, descargar)
+        for ticker_ba, ticker_us, multiplicador in PARES_TC
+    ]
+
+    try:
+        for par, futuro in zip(PARES_TC, futuros):
+            try:
+                df_tc, motivo = futuro.result()
+            except Exception as e:
+                motivos.append(f"Error con {par[0]}: {str(e)}")
+                descartados.append(par[0])
+                continue
+
+            if df_tc is None:
+                motivos.append(motivo)
+                descartados.append(par[0])
+                continue
+
+            metricas.registrar_par_tc(par[0], descartados, [p[0] for p in PARES_TC])
+            return df_tc, par, digest_tc(df_tc), motivos
+    finally:
+        # No esperar a los pares de menor prioridad que sigan descargando
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    metricas.registrar_par_tc(None, descartados, [p[0] for p in PARES_TC])
+    return None, None, None, motivos
+
+# Función para obtener el TC actual sin la serie histórica
+def obtener_tc_reciente(descargar=descargar_cotizaciones):
+    """
+    Respaldo liviano del TC actual para cuando no se pudo armar la serie:
+    consulta solo las últimas ruedas de cada par, en orden de prioridad,
+    sin pasar por el almacén
+    Retorna (tc, precio BA, precio US, par) o None si ningún par tiene datos
+    """
+    end_date = datetime.now().date() + timedelta(days=1)
+    start_date = end_date - timedelta(days=DIAS_TC_RECIENTE)
+
+    for ticker_ba, ticker_us, multiplicador in PARES_TC:
+        try:
+            datos = descargar((ticker_ba, ticker_us), start_date, end_date)
+        except Exception:
+            continue
+        if ticker_ba not in datos or ticker_us not in datos:
+            continue
+
+        cierres = pd.DataFrame({'BA': datos[ticker_ba]['Close'], 'US': datos[ticker_us]['Close']}).dropna()
+        if cierres.empty:
+            continue
+
+        precio_ba, precio_us = float(cierres['BA'].iloc[-1]), float(cierres['US'].iloc[-1])
+        return precio_ba / precio_us * multiplicador, precio_ba, precio_us, (ticker_ba, ticker_us, multiplicador)
+
+    return None
+
+# Función para armar una SerieTC
+def armar_serie_tc(df_tc, par, digest):
+    """
+    Retorna la SerieTC de una serie de TC (o None si no hay serie)
+    """
+    if df_tc is None:
+        return None
+
+    return SerieTC(
+        par=par,
+        ultima_fecha=df_tc.index[-1].strftime('%Y-%m-%d'),
+        digest=digest,
+        df=df_tc
+    )
+
+# Función para convertir precios en ARS a USD
+def convertir_a_usd(close_ars, volume, df_tc, tc_fijo=None):
+    """
+    Combina precios en ARS con el tipo de cambio y calcula el precio en USD
+    Si df_tc es None se usa tc_fijo para todo el período (None si tampoco hay TC fijo)
+    """
+    if df_tc is None:
+        if tc_fijo is None:
+            return None
+
+        df_combined = pd.DataFrame({
+            'Close_ARS': close_ars,
+            'Volume': volume,
+            'TC': float(tc_fijo)
+        }, index=close_ars.index)
+    else:
+        # Crear DataFrame combinado
+        df_combined = pd.DataFrame({
+            'Close_ARS': close_ars,
+            'Volume': volume
+        }, index=close_ars.index)
+
+        # Mergear con tipo de cambio
+        df_combined = df_combined.join(df_tc[['TC']], how='left')
+
+        # Forward/backward fill para días sin TC
+        df_combined['TC'] = df_combined['TC'].ffill().bfill()
+
+    # Calcular precio en USD
+    df_combined['Close_USD'] = df_combined['Close_ARS'] / df_combined['TC']
+
+    # Eliminar filas con NaN
+    return df_combined.dropna()
+
+# Función para calcular el RSI de Wilder de una acción en forma incremental
+def calcular_rsi_wilder_accion(ticker, df, par_tc):
+    """
+    Calcula el RSI de Wilder en ARS y USD para todos los períodos del slider
+    Retoma el estado guardado en el almacén (última rueda cerrada procesada),
+    así cada rueda nueva se agrega en tiempo constante sin recalcular la historia
+    La rueda de hoy se calcula pero no se guarda, porque todavía puede cambiar
+    """
+    clave = f"wilder|{ticker}|{par_tc}"
+    periodos = list(PERIODOS_RSI)
+    precios = df[['Close_ARS', 'Close_USD']].to_numpy()
+    hoy = pd.Timestamp(datetime.now().date())
+
+    # Retomar el estado si la última rueda procesada sigue en los datos con el mismo cierre
+    estado = None
+    previo = None
+    desde = 0
+    guardado = almacen.leer_estado(clave)
+    if guardado is not None:
+        fecha, contenido = guardado
+        fecha = pd.Timestamp(fecha)
+        if fecha in df.index:
+            posicion = df.index.get_loc(fecha)
+            if np.allclose(contenido['estado']['cierre'], precios[posicion]):
+                estado = contenido['estado']
+                previo = contenido['rsi']
+                desde = posicion + 1
+
+    cerradas = desde + int((df.index[desde:] < hoy).sum())
+
+    # Ruedas cerradas nuevas: avanzan el estado guardado
+    rsi_cerradas, estado = indicadores.rsi_wilder(precios[desde:cerradas], periodos, estado)
+    columnas = 2 * len(periodos)
+    rsi = pd.DataFrame(rsi_cerradas.reshape(cerradas - desde, columnas), index=df.index[desde:cerradas])
+    if previo is not None:
+        rsi = pd.concat([previo, rsi])
+
+    if cerradas > desde:
+        # Guardar solo la ventana que se sigue descargando
+        inicio = pd.Timestamp(datetime.now() - timedelta(days=DIAS_SERIE_TC))
+        almacen.guardar_estado(clave, df.index[cerradas - 1], {
+            'estado': estado,
+            'rsi': rsi[rsi.index >= inicio]
+        })
+
+    # Rueda de hoy (provisoria): se calcula sobre una copia del estado
+    if cerradas < len(df):
+        provisorio = {k: v.copy() for k, v in estado.items()}
+        rsi_hoy, _ = indicadores.rsi_wilder(precios[cerradas:], periodos, provisorio)
+        rsi = pd.concat([rsi, pd.DataFrame(rsi_hoy.reshape(len(df) - cerradas, columnas), index=df.index[cerradas:])])
+
+    # Columnas: (ARS, períodos...) y (USD, períodos...)
+    valores = rsi.reindex(df.index).to_numpy().reshape(len(df), 2, len(periodos))
+    return (
+        pd.DataFrame(valores[:, 0], index=df.index, columns=periodos),
+        pd.DataFrame(valores[:, 1], index=df.index, columns=periodos)
+    )
+
+# Función para calcular el RSI de varias acciones a la vez
+def rsi_acciones(dfs, metodo="simple", par_tc=None):
+    """
+    Calcula el RSI en ARS y USD de todas las acciones y todos los períodos
+    del slider con una sola llamada a indicadores.rsi_matriz, sobre un bloque
+    alineado por fecha (fechas × tickers × {ARS, USD})
+    Con el método "wilder" cada acción retoma su estado incremental guardado
+    Retorna {ticker: (rsi_ars, rsi_usd)} con una columna por período
+    """
+    if not dfs:
+        return {}
+
+    with tiempos.medir("rsi", metodo=metodo, tickers=len(dfs)):
+        if metodo == "wilder":
+            return {
+                ticker: calcular_rsi_wilder_accion(ticker, df, par_tc)
+                for ticker, df in dfs.items()
+            }
+
+        tickers = list(dfs)
+        fechas = pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for df in dfs.values()])))
+
+        # Bloque alineado; los días sin cotización de un ticker quedan en NaN
+        bloque = np.full((len(fechas), len(tickers), 2), np.nan)
+        filas = {}
+        for i, ticker in enumerate(tickers):
+            df = dfs[ticker]
+            filas[ticker] = fechas.get_indexer(df.index)
+            bloque[filas[ticker], i, 0] = df['Close_ARS'].to_numpy()
+            bloque[filas[ticker], i, 1] = df['Close_USD'].to_numpy()
+
+        rsi = indicadores.rsi_matriz(bloque, PERIODOS_RSI)
+        periodos = list(PERIODOS_RSI)
+
+        return {
+            ticker: (
+                pd.DataFrame(rsi[filas[ticker], i, 0], index=dfs[ticker].index, columns=periodos),
+                pd.DataFrame(rsi[filas[ticker], i, 1], index=dfs[ticker].index, columns=periodos)
+            )
+            for i, ticker in enumerate(tickers)
+        }
+
+# Función para identificar la versión de los datos de una acción
+def version_datos(df, serie_tc):
+    """
+    Identifica los datos convertidos sin hashearlos: serie de TC usada,
+    último día, cantidad de ruedas y último cierre
+    """
+    clave_tc = serie_tc.clave if serie_tc is not None else None
+    return (clave_tc, df.index[-1].isoformat(), len(df), float(df['Close_ARS'].iloc[-1]), float(df['TC'].iloc[-1]))
+
+# Función para recortar una serie a la ventana pedida
+def recortar_ventana(df, periodo_dias):
+    """
+    Retorna solo las ruedas de los últimos periodo_dias días
+    """
+    inicio = pd.Timestamp(datetime.now() - timedelta(days=periodo_dias)).normalize()
+    return df[df.index >= inicio]
+
+# Función principal de análisis
+def resumir_accion(ticker, ticker_completo, df, rsi_ars, rsi_usd, periodo_rsi=14, periodo_dias=90):
+    """
+    Toma el RSI del período elegido, recorta la ventana y retorna las métricas de una acción
+    """
+    # Calcular RSI en ARS
+    df['RSI_ARS'] = rsi_ars[periodo_rsi]
+
+    # Calcular RSI en USD (¡ESTO ES LO IMPORTANTE!)
+    df['RSI_USD'] = rsi_usd[periodo_rsi]
+
+    # El RSI se calcula sobre toda la historia y recién después se recorta,
+    # así las ruedas previas a la ventana sirven de calentamiento
+    df = recortar_ventana(df, periodo_dias)
+
+    if df.empty:
+        return None
+
+    # Valores actuales
+    precio_ars = df['Close_ARS'].iloc[-1]
+    precio_usd = df['Close_USD'].iloc[-1]
+    tc_actual = df['TC'].iloc[-1]
+    rsi_ars = df['RSI_ARS'].iloc[-1]
+    rsi_usd = df['RSI_USD'].iloc[-1]
+
+    return {
+        'ticker': ticker,
+        'ticker_completo': ticker_completo,
+        'precio_ars': precio_ars,
+        'precio_usd': precio_usd,
+        'tc': tc_actual,
+        'rsi_ars': rsi_ars,
+        'rsi_usd': rsi_usd,
+        'df': df
+    }
+
+# Función para armar la tabla de resultados
+def tabla_resultados(resultados, errores=None):
+    """
+    Arma la tabla de resultados con columnas numéricas (float32); el formato
+    se aplica recién al mostrarla. Las cuentas se hacen en float64 y se
+    convierte solo al armar cada columna
+    Los tickers que fallaron van al final, sin valores y con el motivo en la señal
+    """
+    errores = errores or {}
+    rsi_usd = np.array([r['rsi_usd'] for r in resultados], dtype=np.float64)
+    rsi_ars = np.array([r['rsi_ars'] for r in resultados], dtype=np.float64)
+    senales = np.where(rsi_usd < 30, '🟢 Sobreventa', np.where(rsi_usd > 70, '🔴 Sobrecompra', '🟡 Neutral'))
+
+    def columna(valores):
+        return np.concatenate([np.asarray(valores, dtype=np.float32), np.full(len(errores), np.nan, dtype=np.float32)])
+
+    return pd.DataFrame({
+        'Ticker': [r['ticker'] for r in resultados] + list(errores),
+        'Precio ARS': columna([r['precio_ars'] for r in resultados]),
+        'Precio USD': columna([r['precio_usd'] for r in resultados]),
+        'RSI (ARS)': columna(rsi_ars),
+        'RSI (USD)': columna(rsi_usd),
+        'Diferencia': columna(rsi_usd - rsi_ars),
+        'Señal': list(senales) + [f"❌ Error: {error}" for error in errores.values()]
+    })
+
+# Función para correr todo el cálculo sin interfaz
+def analizar(tickers, periodo_rsi=14, periodo_dias=90, metodo_rsi="simple", descargar=descargar_cotizaciones, tc_fijo=None):
+    """
+    Corre el cálculo completo: serie de TC, cotizaciones de todas las acciones
+    (una sola consulta por tramo faltante), conversión a USD y RSI de todas
+    las acciones en un único bloque
+    Si no hay serie de TC se usa tc_fijo (si tampoco hay, todas fallan)
+    Si falla la consulta conjunta, cada acción se descarga por separado
+    Retorna (resultados en el orden de tickers, dict ticker -> error, SerieTC o None)
+    """
+    df_tc, par, digest, _ = obtener_serie_tc(descargar)
+    serie_tc = armar_serie_tc(df_tc, par, digest)
+
+    simbolos = tuple(dict.fromkeys(f"{t}.BA" for t in tickers))
+    try:
+        lote = descargar_acciones(simbolos, descargar)
+    except Exception:
+        lote = None
+
+    preparados = {}
+    errores = {}
+    for ticker in dict.fromkeys(tickers):
+        if lote is None:
+            try:
+                datos = descargar_acciones((f"{ticker}.BA",), descargar).get(f"{ticker}.BA")
+            except Exception as e:
+                errores[ticker] = str(e)
+                continue
+        else:
+            datos = lote.get(f"{ticker}.BA")
+        if datos is None:
+            errores[ticker] = motivo_sin_datos(f"{ticker}.BA")
+            continue
+
+        df = convertir_a_usd(datos['Close'], datos['Volume'], serie_tc.df if serie_tc is not None else None, tc_fijo)
+        if df is None or df.empty:
+            errores[ticker] = "sin tipo de cambio" if df is None else "sin datos"
+            continue
+        preparados[ticker] = df
+
+    par_tc = serie_tc.par[0] if serie_tc is not None else "fijo"
+    rsi = rsi_acciones(preparados, metodo_rsi, par_tc)
+
+    resultados = []
+    for ticker, df in preparados.items():
+        rsi_ars, rsi_usd = rsi[ticker]
+        resultado = resumir_accion(ticker, f"{ticker}.BA", df, rsi_ars, rsi_usd, periodo_rsi, periodo_dias)
+        if resultado:
+            resultados.append(resultado)
+        else:
+            errores[ticker] = "sin datos en la ventana"
+
+    return resultados, errores, serie_tc
+
+# Función para guardar la tabla de resultados según la extensión
+def guardar_tabla(df, ruta):
+    """
+    Guarda la tabla en CSV, Parquet o JSON según la extensión de la ruta
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato no soportado: {extension or ruta} (usar {', '.join(FORMATOS_SALIDA)})")
+
+    if extension == ".csv":
+        df.to_csv(ruta, index=False)
+    elif extension == ".json":
+        numericas = df.select_dtypes("number").columns
+        df = df.astype({columna: np.float64 for columna in numericas}).round(DECIMALES_JSON)
+        df.to_json(ruta, orient="records", force_ascii=False, indent=2)
+    else:
+        df.to_parquet(ruta, index=False)
+
+# Línea de comandos
+def main(argv=None):
+    """
+    Calcula el RSI en USD de una lista de tickers y guarda la tabla de resultados
+    """
+    parser = argparse.ArgumentParser(description="RSI en USD de acciones argentinas, sin interfaz")
+    parser.add_argument("tickers", nargs="+", help="Tickers de BYMA sin el sufijo .BA (ej. GGAL YPF BBAR)")
+    parser.add_argument("--periodo-rsi", type=int, default=14,
+                        help=f"Período del RSI ({PERIODO_RSI_MINIMO}-{PERIODO_RSI_MAXIMO}, default: 14)")
+    parser.add_argument("--dias", type=int, default=90,
+                        help=f"Días históricos a analizar (máximo {DIAS_MAXIMOS}, default: 90)")
+    parser.add_argument("--metodo", choices=["simple", "wilder"], default="simple",
+                        help="Media simple o suavizado de Wilder (default: simple)")
+    parser.add_argument("--tc-fijo", type=float, default=None,
+                        help="TC a usar para todo el período si no se puede obtener el TC histórico")
+    parser.add_argument("--solo-cache", action="store_true",
+                        help="No consultar la red: usar solo las ruedas del almacén local")
+    parser.add_argument("--proveedor", default=None,
+                        help="Proveedor de cotizaciones: 'yahoo' o 'local:CARPETA[,latencia=S][,fallas=P]' (default: RSI_PROVEEDOR o yahoo)")
+    parser.add_argument("--salida", default=None,
+                        help="Archivo de salida (.csv, .parquet o .json); sin salida se imprime la tabla")
+    args = parser.parse_args(argv)
+
+    if not PERIODO_RSI_MINIMO <= args.periodo_rsi <= PERIODO_RSI_MAXIMO:
+        parser.error(f"--periodo-rsi debe estar entre {PERIODO_RSI_MINIMO} y {PERIODO_RSI_MAXIMO}")
+    if not 1 <= args.dias <= DIAS_MAXIMOS:
+        parser.error(f"--dias debe estar entre 1 y {DIAS_MAXIMOS}")
+    if args.salida is not None and os.path.splitext(args.salida)[1].lower() not in FORMATOS_SALIDA:
+        parser.error(f"--salida debe terminar en {', '.join(FORMATOS_SALIDA)}")
+
+    if args.proveedor is not None:
+        try:
+            proveedores.usar(proveedores.crear_proveedor(args.proveedor))
+        except ValueError as e:
+            parser.error(str(e))
+
+    tickers = [t.strip().upper() for t in args.tickers if t.strip()]
+    descargar = sin_descarga if args.solo_cache else descargar_cotizaciones
+
+    resultados, errores, serie_tc = analizar(
+        tickers, args.periodo_rsi, args.dias, args.metodo,
+        descargar=descargar,
+        tc_fijo=args.tc_fijo
+    )
+
+    for ticker, error in errores.items():
+        print(f"No se pudo procesar {ticker}: {error}", file=sys.stderr)
+
+    tabla = tabla_resultados(resultados, errores)
+    if args.salida is None:
+        print(tabla.to_string(index=False))
+    else:
+        guardar_tabla(tabla, args.salida)
+        tc = f"TC {serie_tc.par[0]}" if serie_tc is not None else f"TC fijo {args.tc_fijo}"
+        print(f"{len(resultados)} acciones guardadas en {args.salida} ({tc})", file=sys.stderr)
+
+    return 0 if resultados else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+Proveedores de cotizaciones diarias
+
+Todas las descargas (TC y acciones) pasan por el proveedor actual:
+
+- ProveedorYahoo: consulta yfinance (el de siempre)
+- ProveedorLocal: sirve fixtures grabados en una carpeta (un archivo
+  SIMBOLO.parquet o SIMBOLO.csv por símbolo), con latencia y fallas
+  simuladas, para pruebas y mediciones reproducibles sin internet
+
+El proveedor se elige con la variable de entorno RSI_PROVEEDOR, por ejemplo
+"yahoo" (default) o "local:fixtures,latencia=0.3,fallas=0.1,semilla=1".
+Los fixtures se graban desde Yahoo con:
+
+    python proveedores.py fixtures GGAL.BA GGAL BMA.BA BMA YPF.BA YPF --dias 500
+"""
+import abc
+import argparse
+import ast
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import descargas
+
+
+class ErrorTransitorio(ConnectionError):
+    """
+    Falla transitoria de algunos símbolos de una consulta (ej. límite de
+    pedidos del proveedor); simbolos son los que fallaron y datos los que sí
+    llegaron, para reintentar solo los que fallaron
+    """
+    def __init__(self, mensaje, simbolos=(), datos=None):
+        super().__init__(mensaje)
+        self.simbolos = tuple(simbolos)
+        self.datos = datos or {}
+
+
+class _ErroresYahoo(logging.Handler):
+    """
+    Junta los errores por símbolo que yfinance registra en su logger en vez
+    de lanzarlos ("['GGAL.BA']: YFRateLimitError(...)"), solo los del hilo
+    que hace la consulta
+    """
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.hilo = threading.get_ident()
+        self.errores = {}
+
+    def emit(self, registro):
+        if registro.thread != self.hilo:
+            return
+        coincidencia = re.match(r"\s*(\[.*?\]):\s*(.*)", registro.getMessage(), re.DOTALL)
+        if not coincidencia:
+            return
+        try:
+            simbolos = ast.literal_eval(coincidencia.group(1))
+        except (ValueError, SyntaxError):
+            return
+        for simbolo in simbolos:
+            self.errores[str(simbolo).upper()] = coincidencia.group(2).strip()
+
+
+class Proveedor(abc.ABC):
+    """
+    Interfaz de los proveedores: consultar(simbolos, start_date, end_date)
+    retorna {simbolo: DataFrame con Close y Volume} con las ruedas de
+    [start_date, end_date); los símbolos sin datos no aparecen
+    """
+    nombre = "proveedor"
+
+    @abc.abstractmethod
+    def consultar(self, simbolos, start_date, end_date):
+        """
+        Retorna {simbolo: DataFrame con Close y Volume} con las ruedas de [start_date, end_date)
+        """
+
+
+class ProveedorYahoo(Proveedor):
+    """
+    Cotizaciones de Yahoo Finance (una sola consulta para todos los símbolos)
+    """
+    nombre = "yahoo"
+
+    def consultar(self, simbolos, start_date, end_date):
+        # yfinance tarda en importarse: solo se carga si hay que descargar algo
+        import yfinance as yf
+
+        # yfinance no lanza los errores de cada símbolo (ej. límite de pedidos):
+        # los registra en su logger y deja ese símbolo vacío
+        errores = _ErroresYahoo()
+        registro = logging.getLogger("yfinance")
+        registro.addHandler(errores)
+        try:
+            # Precios ajustados por dividendos y splits (el almacén detecta los reajustes)
+            # Desde yfinance 1.7 cada download tiene su propio estado, así que
+            # se puede llamar desde varios hilos a la vez (ver requirements.txt)
+            df = yf.download(list(simbolos), start=start_date, end=end_date, progress=False, auto_adjust=True)
+        finally:
+            registro.removeHandler(errores)
+
+        datos = {}
+        if df.empty:
+            simbolos_con_datos = ()
+        else:
+            simbolos_con_datos = simbolos
+        for simbolo in simbolos_con_datos:
+            close, volume = extraer_close_volume(df, simbolo)
+            if close is None:
+                continue
+
+            # Cada símbolo conserva solo sus propias ruedas
+            close = close.dropna()
+            if close.empty:
+                continue
+
+            datos[simbolo] = pd.DataFrame({
+                'Close': close,
+                'Volume': volume.reindex(close.index).fillna(0)
+            }, index=close.index)
+
+        # Los transitorios se lanzan (con lo que sí llegó) para que
+        # descargas.proteger reintente solo esos; los demás (símbolo
+        # inexistente, sin ruedas) quedan como símbolos sin datos
+        transitorios = [
+            s for s in simbolos
+            if descargas.es_mensaje_transitorio(errores.errores.get(s.upper(), ""))
+        ]
+        if transitorios:
+            raise ErrorTransitorio(
+                "; ".join(f"{s}: {errores.errores[s.upper()]}" for s in transitorios),
+                simbolos=transitorios,
+                datos={s: df for s, df in datos.items() if s not in transitorios}
+            )
+
+        return datos
+
+
+class ProveedorLocal(Proveedor):
+    """
+    Cotizaciones grabadas en una carpeta (SIMBOLO.parquet o SIMBOLO.csv con
+    columnas Date, Close y Volume). Cada consulta tarda latencia segundos
+    (más una variación aleatoria de hasta variacion segundos) y falla con
+    probabilidad fallas, con un ConnectionError como los cortes de la red
+    """
+    nombre = "local"
+
+    def __init__(self, carpeta, latencia=0.0, variacion=0.0, fallas=0.0, semilla=None):
+        self.carpeta = carpeta
+        self.latencia = latencia
+        self.variacion = variacion
+        self.fallas = fallas
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _serie(self, simbolo):
+        with self._lock:
+            if simbolo not in self._series:
+                self._series[simbolo] = leer_fixture(self.carpeta, simbolo)
+            return self._series[simbolo]
+
+    def consultar(self, simbolos, start_date, end_date):
+        with self._lock:
+            demora = self.latencia + self._azar.uniform(0, self.variacion)
+            falla = self._azar.random() < self.fallas
+        if demora:
+            time.sleep(demora)
+        if falla:
+            raise ConnectionError(f"Falla simulada consultando {', '.join(simbolos)}")
+
+        inicio = pd.Timestamp(start_date)
+        fin = pd.Timestamp(end_date)
+        datos = {}
+        for simbolo in simbolos:
+            df = self._serie(simbolo)
+            if df is None:
+                continue
+            df = df[(df.index >= inicio) & (df.index < fin)]
+            if not df.empty:
+                datos[simbolo] = df
+        return datos
+
+
+# Función para extraer Close y Volume de una descarga
+def extraer_close_volume(df, simbolo=None):
+    """
+    Extrae Close y Volume de una descarga de yfinance, ya sea con
+    columnas simples o MultiIndex (una o varias acciones)
+    """
+    def columna(campo):
+        if campo not in df.columns.get_level_values(0):
+            return None
+        serie = df[campo]
+        if isinstance(serie, pd.DataFrame):
+            if simbolo is not None and simbolo in serie.columns:
+                serie = serie[simbolo]
+            else:
+                serie = serie.iloc[:, 0]
+        return serie
+
+    close = columna('Close')
+    volume = columna('Volume')
+    if volume is None and close is not None:
+        volume = pd.Series([0]*len(close), index=close.index)
+
+    return close, volume
+
+
+# Función para leer el fixture de un símbolo
+def leer_fixture(carpeta, simbolo):
+    """
+    Lee SIMBOLO.parquet o SIMBOLO.csv de la carpeta
+    Retorna un DataFrame con Close y Volume indexado por fecha, o None si no hay archivo
+    """
+    ruta = os.path.join(carpeta, simbolo)
+    if os.path.exists(ruta + ".parquet"):
+        df = pd.read_parquet(ruta + ".parquet")
+    elif os.path.exists(ruta + ".csv"):
+        df = pd.read_csv(ruta + ".csv")
+    else:
+        return None
+
+    if 'Date' in df.columns:
+        df = df.set_index('Date')
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.index), name='Date')
+    return df[['Close', 'Volume']].astype(float).sort_index()
+
+
+# Función para grabar fixtures desde otro proveedor
+def grabar_fixtures(proveedor, simbolos, start_date, end_date, carpeta, formato="csv"):
+    """
+    Consulta los símbolos al proveedor y guarda un archivo por símbolo en la carpeta
+    Retorna la lista de símbolos grabados
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    datos = proveedor.consultar(tuple(simbolos), start_date, end_date)
+
+    for simbolo, df in datos.items():
+        ruta = os.path.join(carpeta, f"{simbolo}.{formato}")
+        if formato == "parquet":
+            df.to_parquet(ruta)
+        else:
+            df.to_csv(ruta, index_label='Date')
+    return list(datos)
+
+
+# Función para crear un proveedor a partir de su especificación
+def crear_proveedor(especificacion):
+    """
+    Crea el proveedor de una especificación "yahoo" o
+    "local:CARPETA[,latencia=S][,variacion=S][,fallas=P][,semilla=N]"
+    """
+    nombre, _, resto = especificacion.partition(":")
+    if nombre == "yahoo":
+        return ProveedorYahoo()
+    if nombre != "local" or not resto:
+        raise ValueError(f"Proveedor desconocido: {especificacion} (usar 'yahoo' o 'local:CARPETA')")
+
+    carpeta, *opciones = resto.split(",")
+    parametros = {}
+    for opcion in opciones:
+        clave, _, valor = opcion.partition("=")
+        if clave not in ("latencia", "variacion", "fallas", "semilla"):
+            raise ValueError(f"Opción desconocida del proveedor local: {clave}")
+        parametros[clave] = int(valor) if clave == "semilla" else float(valor)
+    return ProveedorLocal(carpeta, **parametros)
+
+
+_proveedor = None
+_lock_proveedor = threading.Lock()
+
+
+# Función para obtener el proveedor en uso
+def actual():
+    """
+    Retorna el proveedor en uso (el de RSI_PROVEEDOR, o Yahoo)
+    """
+    global _proveedor
+
+    with _lock_proveedor:
+        if _proveedor is None:
+            _proveedor = crear_proveedor(os.environ.get("RSI_PROVEEDOR", "yahoo"))
+        return _proveedor
+
+
+# Función para cambiar el proveedor en uso
+def usar(proveedor):
+    """
+    Cambia el proveedor de todo el proceso (ej. un ProveedorLocal en las pruebas)
+    """
+    global _proveedor
+
+    with _lock_proveedor:
+        _proveedor = proveedor
+
+
+# Línea de comandos para grabar fixtures
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Graba fixtures de cotizaciones para ProveedorLocal")
+    parser.add_argument("carpeta", help="Carpeta de destino")
+    parser.add_argument("simbolos", nargs="+", help="Símbolos completos (ej. GGAL.BA GGAL)")
+    parser.add_argument("--dias", type=int, default=500, help="Días de historia (default: 500)")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args(argv)
+
+    fin = datetime.now().date() + timedelta(days=1)
+    grabados = grabar_fixtures(ProveedorYahoo(), args.simbolos, fin - timedelta(days=args.dias), fin, args.carpeta, args.formato)
+    faltantes = [s for s in args.simbolos if s not in grabados]
+
+    print(f"{len(grabados)} símbolos grabados en {args.carpeta}")
+    if faltantes:
+        print("Sin datos: " + ", ".join(faltantes))
+    return 0 if grabados else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Almacén local: qué tramos se piden según la cobertura guardada y el
+calendario, y cuándo se descarga de nuevo la historia de un símbolo
+
+Las pruebas usan un almacén temporal, un proveedor falso que registra cada
+consulta y un `ahora` fijo (la semana del 12 al 16 de octubre de 2026)
+"""
+import os
+import sys
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import almacen  # noqa: E402
+
+INICIO = date(2026, 9, 1)
+
+# BYMA abre a las 11:00 y cierra a las 17:00 de Buenos Aires (14:00 y 20:00 UTC)
+SABADO = datetime(2026, 10, 17, 15, 0, tzinfo=timezone.utc)
+DOMINGO = datetime(2026, 10, 18, 15, 0, tzinfo=timezone.utc)
+LUNES_ANTES_DE_ABRIR = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+LUNES_EN_RUEDA = datetime(2026, 10, 19, 15, 0, tzinfo=timezone.utc)
+VIERNES_CERRADO = datetime(2026, 10, 16, 23, 0, tzinfo=timezone.utc)
+
+
+class ProveedorFalso:
+    """
+    Ruedas de lunes a viernes hasta publicado (inclusive); factor multiplica
+    los precios, como un reajuste por dividendo
+    """
+    def __init__(self, publicado=date(2026, 10, 16)):
+        self.publicado = publicado
+        self.factor = 1.0
+        self.consultas = []
+
+    def __call__(self, simbolos, start, end):
+        self.consultas.append((tuple(simbolos), start, end))
+        fechas = pd.bdate_range(start, min(pd.Timestamp(end) - pd.Timedelta(days=1), pd.Timestamp(self.publicado)))
+        precios = [self.factor * (100 + fecha.day) for fecha in fechas]
+        return {
+            simbolo: pd.DataFrame({'Close': precios, 'Volume': 1000.0}, index=pd.DatetimeIndex(fechas, name='Date'))
+            for simbolo in simbolos
+            if len(fechas)
+        }
+
+
+@pytest.fixture(autouse=True)
+def almacen_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(almacen, "RUTA_ALMACEN", str(tmp_path / "cotizaciones.sqlite"))
+
+
+def test_descarga_en_frio():
+    proveedor = ProveedorFalso()
+
+    datos = almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+
+    assert proveedor.consultas == [(("GGAL.BA",), INICIO, date(2026, 10, 18))]
+    assert datos["GGAL.BA"].index[-1] == pd.Timestamp("2026-10-16")
+    assert almacen.cobertura("GGAL.BA") == (INICIO, date(2026, 10, 16))
+
+
+def test_fin_de_semana_no_consulta():
+    proveedor = ProveedorFalso()
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+    proveedor.consultas.clear()
+
+    datos = almacen.historial(["GGAL.BA"], INICIO, proveedor, DOMINGO)
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, LUNES_ANTES_DE_ABRIR)
+
+    assert proveedor.consultas == []
+    assert datos["GGAL.BA"].index[-1] == pd.Timestamp("2026-10-16")
+
+
+def test_lunes_pide_la_cola_desde_el_ultimo_cierre():
+    proveedor = ProveedorFalso()
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+    proveedor.consultas.clear()
+    proveedor.publicado = date(2026, 10, 19)
+
+    datos = almacen.historial(["GGAL.BA"], INICIO, proveedor, LUNES_EN_RUEDA)
+
+    # Una rueda superpuesta (el viernes) para detectar reajustes
+    assert proveedor.consultas == [(("GGAL.BA",), date(2026, 10, 16), date(2026, 10, 20))]
+    assert datos["GGAL.BA"].index[-1] == pd.Timestamp("2026-10-19")
+    # La rueda del lunes sigue abierta: la cobertura no pasa del viernes
+    assert almacen.cobertura("GGAL.BA") == (INICIO, date(2026, 10, 16))
+
+
+def test_reajuste_recarga_la_historia():
+    proveedor = ProveedorFalso()
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+    proveedor.consultas.clear()
+    proveedor.publicado = date(2026, 10, 19)
+    proveedor.factor = 0.9
+
+    datos = almacen.historial(["GGAL.BA"], INICIO, proveedor, LUNES_EN_RUEDA)
+
+    assert proveedor.consultas == [
+        (("GGAL.BA",), date(2026, 10, 16), date(2026, 10, 20)),
+        (("GGAL.BA",), INICIO, date(2026, 10, 20))
+    ]
+    esperado = [0.9 * (100 + fecha.day) for fecha in datos["GGAL.BA"].index]
+    assert datos["GGAL.BA"]['Close'].tolist() == pytest.approx(esperado)
+    assert datos["GGAL.BA"].index[0] == pd.Timestamp(INICIO)
+
+
+def test_sin_reajuste_no_recarga():
+    proveedor = ProveedorFalso()
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+    proveedor.consultas.clear()
+
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, LUNES_EN_RUEDA)
+
+    assert len(proveedor.consultas) == 1
+
+
+def test_cobertura_no_pasa_de_la_ultima_rueda_recibida():
+    # El viernes ya cerró pero el proveedor todavía no publicó esa rueda
+    proveedor = ProveedorFalso(publicado=date(2026, 10, 15))
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, VIERNES_CERRADO)
+    assert almacen.cobertura("GGAL.BA") == (INICIO, date(2026, 10, 15))
+
+    # Al día siguiente se vuelve a pedir desde el jueves y llega el viernes
+    proveedor.consultas.clear()
+    proveedor.publicado = date(2026, 10, 16)
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+
+    assert proveedor.consultas == [(("GGAL.BA",), date(2026, 10, 15), date(2026, 10, 18))]
+    assert almacen.cobertura("GGAL.BA") == (INICIO, date(2026, 10, 16))
+
+
+def test_tramos_faltantes():
+    proveedor = ProveedorFalso()
+    assert almacen.tramos_faltantes("GGAL.BA", INICIO, SABADO) == [(INICIO, date(2026, 10, 18))]
+
+    almacen.historial(["GGAL.BA"], INICIO, proveedor, SABADO)
+
+    # Más historia hacia atrás: solo el tramo previo
+    assert almacen.tramos_faltantes("GGAL.BA", date(2026, 8, 1), DOMINGO) == [(date(2026, 8, 1), INICIO)]
+    assert almacen.tramos_faltantes("GGAL.BA", INICIO, LUNES_EN_RUEDA) == [(date(2026, 10, 16), date(2026, 10, 20))]
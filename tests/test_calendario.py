@@ -0,0 +1,55 @@
+"""
+Calendario de ruedas: horarios en la zona de cada mercado, también en el
+cambio de horario de EE.UU. (1 de noviembre de 2026; Buenos Aires no cambia)
+"""
+import os
+import sys
+from datetime import date, datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calendario  # noqa: E402
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_en_rueda_sigue_el_horario_de_cada_mercado():
+    # BYMA: 11:00 a 17:00 de Buenos Aires (UTC-3), más DEMORA_CIERRE
+    assert not calendario.en_rueda("byma", utc(2026, 10, 16, 13, 59))
+    assert calendario.en_rueda("byma", utc(2026, 10, 16, 14, 0))
+    assert calendario.en_rueda("byma", utc(2026, 10, 16, 20, 15))
+    assert not calendario.en_rueda("byma", utc(2026, 10, 16, 20, 30))
+    assert not calendario.en_rueda("byma", utc(2026, 10, 17, 15, 0))
+
+
+def test_cambio_de_horario_en_estados_unidos():
+    # 9:30 de Nueva York es 13:30 UTC con horario de verano y 14:30 UTC después
+    assert calendario.en_rueda("us", utc(2026, 10, 30, 13, 45))
+    assert not calendario.en_rueda("us", utc(2026, 11, 2, 13, 45))
+    assert calendario.en_rueda("us", utc(2026, 11, 2, 14, 45))
+
+    # 16:00 + 30 minutos: 20:30 UTC antes del cambio, 21:30 UTC después
+    assert not calendario.en_rueda("us", utc(2026, 10, 30, 20, 45))
+    assert calendario.en_rueda("us", utc(2026, 11, 2, 20, 45))
+
+
+def test_vigencia_en_el_cambio_de_horario():
+    # Lunes 2/11 a las 13:45 UTC: BYMA todavía no abrió y NYSE ya no abre a esa hora
+    assert calendario.vigencia(utc(2026, 11, 2, 13, 45)) == "cerrado:2026-10-30,2026-10-30"
+    # El viernes anterior, a la misma hora UTC, NYSE ya estaba en rueda
+    assert calendario.vigencia(utc(2026, 10, 30, 13, 45)).startswith("rueda:")
+
+
+def test_vigencia_fija_con_los_mercados_cerrados():
+    sabado = calendario.vigencia(utc(2026, 10, 17, 15, 0))
+    assert sabado == calendario.vigencia(utc(2026, 10, 18, 23, 0))
+    assert sabado == "cerrado:2026-10-16,2026-10-16"
+
+
+def test_ultima_rueda_cerrada_y_rueda_nueva():
+    assert calendario.ultima_rueda_cerrada("byma", utc(2026, 10, 19, 15, 0)) == date(2026, 10, 16)
+    assert calendario.ultima_rueda_cerrada("byma", utc(2026, 10, 19, 21, 0)) == date(2026, 10, 19)
+    assert not calendario.hay_rueda_nueva("byma", date(2026, 10, 16), utc(2026, 10, 19, 13, 0))
+    assert calendario.hay_rueda_nueva("byma", date(2026, 10, 16), utc(2026, 10, 19, 14, 0))
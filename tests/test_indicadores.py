@@ -0,0 +1,59 @@
+"""
+El RSI de un bloque (rsi_matriz) tiene que ser igual al de cada serie sola
+(calcular_rsi), aunque los tickers no coticen los mismos días
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import indicadores  # noqa: E402
+
+PERIODOS = [7, 14, 30]
+
+
+def serie(semilla, n=300):
+    rng = np.random.default_rng(semilla)
+    return pd.Series(100 + np.cumsum(rng.normal(0, 1, n)))
+
+
+def test_bloque_igual_a_cada_serie_sola():
+    n = 300
+    rng = np.random.default_rng(0)
+    series = [serie(1, n), serie(2, n), serie(3, n), serie(4, n)]
+    huecos = [
+        np.zeros(n, dtype=bool),                      # cotiza todos los días
+        rng.random(n) < 0.3,                          # poco líquido
+        np.arange(n) < 40,                            # empieza a cotizar después
+        (np.arange(n) > 100) & (np.arange(n) < 130)   # suspendido un mes
+    ]
+    bloque = np.stack([np.where(h, np.nan, s) for s, h in zip(series, huecos)], axis=1)
+
+    rsi = indicadores.rsi_matriz(bloque, PERIODOS)
+
+    for i, (s, h) in enumerate(zip(series, huecos)):
+        propia = s[~h].reset_index(drop=True)
+        for k, periodo in enumerate(PERIODOS):
+            esperado = indicadores.calcular_rsi(propia, periodo).to_numpy()
+            np.testing.assert_allclose(rsi[~h, i, k], esperado, rtol=1e-9, atol=1e-9, equal_nan=True)
+            assert np.isnan(rsi[h, i, k]).all()
+
+
+def test_rsi_no_depende_de_los_otros_tickers():
+    a = serie(5)
+    a[::3] = np.nan
+    diario = serie(6)
+
+    solo = indicadores.rsi_matriz(a.to_numpy()[:, None], PERIODOS)[:, 0]
+    con_otro = indicadores.rsi_matriz(np.stack([a, diario], axis=1), PERIODOS)[:, 0]
+
+    np.testing.assert_allclose(solo, con_otro, equal_nan=True)
+
+
+def test_columna_sin_precios():
+    bloque = np.stack([serie(7, 50), np.full(50, np.nan)], axis=1)
+    rsi = indicadores.rsi_matriz(bloque, PERIODOS)
+    assert np.isnan(rsi[:, 1]).all()
@@ -0,0 +1,132 @@
+"""
+Tiempos del script de Streamlit y de cada etapa del cálculo
+
+La primera ejecución del script en el proceso es el arranque en frío
+(importa pandas, numpy y los módulos del proyecto); las siguientes son
+reruns, que deberían costar poco.
+
+Las etapas (descarga de cada par de TC, preparación de cada ticker, cada
+llamada a una función cacheada con su acierto o fallo, RSI, gráfico) se
+miden con medir(). Cada medición se agrega al registro de la ejecución en
+curso (ver iniciar_registro) y se escribe como una línea JSON en el log
+"rsi_usd.tiempos", para poder analizar sesiones reales y comparar versiones.
+Otros módulos pueden recibir cada medición con al_medir().
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("rsi_usd.tiempos")
+
+_lock = threading.Lock()
+_arranque_frio = None
+_ejecuciones = 0
+
+# Registro de la ejecución en curso y medición abierta más interna.
+# Los hilos de un pool los heredan si la tarea corre con copy_context().run
+_registro = contextvars.ContextVar("registro_tiempos", default=None)
+_medicion = contextvars.ContextVar("medicion_actual", default=None)
+
+_logs_configurados = False
+
+# Funciones que reciben cada medición terminada (ej. las métricas de metricas.py)
+_observadores = []
+
+
+def configurar_logs():
+    """
+    Muestra los logs de la aplicación ("rsi_usd.*") en la salida de errores,
+    con el nivel de la variable de entorno RSI_LOG_NIVEL (default: INFO)
+    """
+    global _logs_configurados
+
+    with _lock:
+        if _logs_configurados:
+            return
+        raiz = logging.getLogger("rsi_usd")
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+        raiz.addHandler(manejador)
+        raiz.setLevel(os.environ.get("RSI_LOG_NIVEL", "INFO").upper())
+        raiz.propagate = False
+        _logs_configurados = True
+
+
+def iniciar_registro():
+    """
+    Empieza el registro de mediciones de una ejecución del script
+    Retorna la lista donde se van agregando las mediciones
+    """
+    registro = []
+    _registro.set(registro)
+    return registro
+
+
+@contextmanager
+def medir(etapa, **campos):
+    """
+    Mide el bloque como una etapa; los campos (ticker, par, cache...) se
+    guardan junto con la duración en ms. Dentro del bloque, anotar() agrega
+    campos a esta medición
+    """
+    datos = {'etapa': etapa, **campos}
+    token = _medicion.set(datos)
+    inicio = time.perf_counter()
+    try:
+        yield datos
+    except Exception as e:
+        datos['error'] = type(e).__name__
+        raise
+    finally:
+        datos['ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+        _medicion.reset(token)
+        registro = _registro.get()
+        if registro is not None:
+            registro.append(datos)
+        logger.info(json.dumps(datos, ensure_ascii=False, default=str))
+        for observador in _observadores:
+            observador(datos)
+
+
+def al_medir(observador):
+    """
+    Registra una función que se llama con los datos de cada medición terminada
+    """
+    _observadores.append(observador)
+
+
+def anotar(**campos):
+    """
+    Agrega campos a la medición en curso (ej. cache="fallo" desde adentro de una función cacheada)
+    """
+    datos = _medicion.get()
+    if datos is not None:
+        datos.update(campos)
+
+
+def fin_ejecucion(inicio):
+    """
+    Registra la duración de una ejecución del script que empezó en
+    inicio (valor de time.perf_counter() al principio del script)
+    Retorna (duración de esta ejecución, duración del arranque en frío) en segundos
+    """
+    global _arranque_frio, _ejecuciones
+
+    duracion = time.perf_counter() - inicio
+    with _lock:
+        _ejecuciones += 1
+        if _arranque_frio is None:
+            _arranque_frio = duracion
+        numero, arranque_frio = _ejecuciones, _arranque_frio
+
+    logger.info(json.dumps({
+        'etapa': 'ejecucion',
+        'numero': numero,
+        'ms': round(duracion * 1000, 2),
+        'arranque_frio_ms': round(arranque_frio * 1000, 2)
+    }))
+    return duracion, arranque_frio